@@ -19,75 +19,378 @@ import json
 import argparse
 import sys
 import os
+import re
+import signal
+import time
+import threading
+import math
+import logging
+import logging.handlers
+import queue
+import atexit
+import contextvars
+import heapq
+import random
 import itertools
-from typing import List, Dict, Any, Set, Tuple
+import functools
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from typing import List, Dict, Any, Set, Tuple, Iterator, Sequence
 from datetime import datetime
-from collections import defaultdict
+from collections import deque
 import numpy as np
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
 
-class BisectionNodeTester:
+try:
+    import numba
+except ImportError:
+    numba = None
+
+from json_io import dumps as _dumps
+
+
+logger = logging.getLogger(__name__)
+
+# Name of the NCCL test running in the current thread, added to its log lines
+_current_test = contextvars.ContextVar("current_test", default="")
+
+# NCCL perf line: size count type redop time algbw busbw (captures busbw)
+_BW_RE = re.compile(rb'^\s*\d+\s+\d+\s+\w+\s+\w+\s+[\d.]+\s+[\d.]+\s+([\d.]+)', re.MULTILINE)
+
+# Output that means the test has already failed
+_FAILURE_RE = re.compile(rb'NCCL WARN|ERROR')
+
+# Marks result lines printed by nccl_probe_worker.py
+PROBE_RESULT_PREFIX = "PROBE_RESULT "
+
+
+def _signal_group(process: subprocess.Popen, sig: int = signal.SIGKILL):
+    """Signal a launcher started with start_new_session and all its children
+
+    Killing only mpirun leaves ssh/orted holding the output pipe open.
     """
-    Binary search based node testing to identify slow nodes
+    try:
+        os.killpg(process.pid, sig)  # Session leader: pgid == pid
+    except ProcessLookupError:
+        pass
 
-    Algorithm:
-    1. Test all nodes together - if good, exit
-    2. If bad, split into two halves, test each half
-    3. For bad half, recursively split and test
-    4. Continue until individual bad nodes are identified
+
+def _start_watchdog(process: subprocess.Popen, timeout: float) -> Tuple[threading.Timer, threading.Event]:
+    """Kill process's group after timeout seconds; the event records that it fired"""
+    expired = threading.Event()
+
+    def expire():
+        expired.set()
+        _signal_group(process)
+
+    watchdog = threading.Timer(timeout, expire)
+    watchdog.start()
+    return watchdog, expired
+
+
+@functools.lru_cache(maxsize=None)
+def _parse_hostfile(path: str) -> Tuple[str, ...]:
+    """Parse MPI hostfile (cached, shared by all testers)"""
+    hosts = []
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                host = line.split()[0]
+                hosts.append(host)
+    return tuple(hosts)
+
+
+class _TestNameFilter(logging.Filter):
+    """Prefix records with the test that emitted them (parallel pair tests)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        test_name = _current_test.get()
+        record.test_name = f"[{test_name}] " if test_name else ""
+        return True
+
+
+def _setup_logging():
+    """
+    Log through a queue so worker threads never block on stdout;
+    a single listener thread does the actual writes
+    """
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(_TestNameFilter())
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter("%(test_name)s%(message)s"))
+
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    listener.start()
+    atexit.register(listener.stop)
+
+    root = logging.getLogger()
+    root.addHandler(queue_handler)
+    root.setLevel(logging.INFO)
+
+
+def _accumulate_pairs_numpy(idx0: np.ndarray, idx1: np.ndarray, bws: np.ndarray,
+                            oks: np.ndarray, n: int) -> Tuple[np.ndarray, ...]:
+    """Per-node tests, failures, bandwidth count, mean and M2 over flat pair arrays"""
+    idx = np.concatenate((idx0, idx1))
+    bw = np.concatenate((bws, bws))
+    failed = np.concatenate((~oks, ~oks))
+
+    tests = np.bincount(idx, minlength=n)
+    failures = np.bincount(idx, weights=failed, minlength=n)
+
+    has_bw = ~np.isnan(bw)
+    bw_idx = idx[has_bw]
+    bw = bw[has_bw]
+    count = np.bincount(bw_idx, minlength=n)
+    mean = np.bincount(bw_idx, weights=bw, minlength=n) / np.maximum(count, 1)
+    dev = bw - mean[bw_idx]
+    m2 = np.bincount(bw_idx, weights=dev * dev, minlength=n)
+
+    return tests, failures, count, mean, m2
+
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def _accumulate_pairs(idx0, idx1, bws, oks, n):
+        """Single pass Welford update of both nodes of every pair"""
+        tests = np.zeros(n, dtype=np.int64)
+        failures = np.zeros(n, dtype=np.int64)
+        count = np.zeros(n, dtype=np.int64)
+        mean = np.zeros(n, dtype=np.float64)
+        m2 = np.zeros(n, dtype=np.float64)
+
+        for k in range(idx0.size):
+            bw = bws[k]
+            for i in (idx0[k], idx1[k]):
+                tests[i] += 1
+                if not oks[k]:
+                    failures[i] += 1
+                if not np.isnan(bw):
+                    count[i] += 1
+                    delta = bw - mean[i]
+                    mean[i] += delta / count[i]
+                    m2[i] += delta * (bw - mean[i])
+
+        return tests, failures, count, mean, m2
+else:
+    _accumulate_pairs = _accumulate_pairs_numpy
+
+
+class NCCLProbe:
     """
+    Runs NCCL all_reduce tests on node subsets
+
+    Shared by the bisection and pairwise testers: results are memoized per
+    node set and every finished test is recorded in test_history.
+    """
+
+    TEST_TIMEOUT = 300  # seconds
+    EARLY_STOP_SAMPLES = 2  # busbw lines needed before a test may be cut short
+    EARLY_STOP_SECONDS = 30
+    HISTORY_PREFIX = "test"
 
     def __init__(self, hostfile: str, gpus_per_node: int = 8,
-                 threshold_gb_s: float = None, output_dir: str = "./results"):
+                 threshold_gb_s: float = None, output_dir: str = "./results",
+                 persistent: bool = False):
         self.hostfile = hostfile
         self.gpus_per_node = gpus_per_node
         self.threshold_gb_s = threshold_gb_s
         self.output_dir = output_dir
-        self.hosts = self._parse_hostfile()
+        self.persistent = persistent
+        self.hosts = list(_parse_hostfile(hostfile))
+        self._host_index = {host: i for i, host in enumerate(self.hosts)}
         self.test_history = []
-        self.bad_nodes = set()
-        self.good_nodes = set()
+        self._result_cache: Dict[frozenset, Dict[str, Any]] = {}
+
+        # One timestamp per run; output files are numbered within it so tests
+        # started in the same second (e.g. parallel pairs) never collide
+        self._run_id = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self._seq = itertools.count()
 
         os.makedirs(output_dir, exist_ok=True)
 
-    def _parse_hostfile(self) -> List[str]:
-        """Parse MPI hostfile"""
-        hosts = []
-        with open(self.hostfile, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#'):
-                    host = line.split()[0]
-                    hosts.append(host)
-        return hosts
-
-    def _create_temp_hostfile(self, nodes: List[str]) -> str:
-        """Create temporary hostfile for subset of nodes"""
-        temp_file = os.path.join(self.output_dir, f"hostfile_temp_{len(nodes)}nodes.txt")
-        with open(temp_file, 'w') as f:
-            for node in nodes:
-                f.write(f"{node} slots={self.gpus_per_node}\n")
-        return temp_file
+        # Each finished test is appended here so a crashed run keeps its results
+        self.history_file = os.path.join(
+            output_dir,
+            f"{self.HISTORY_PREFIX}_history_{self._run_id}.jsonl"
+        )
+        self._history_fp = None  # Opened on first write
+        self._history_lock = threading.Lock()
+
+        # Persistent probe worker (--persistent), started on first use
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    def close(self):
+        """Stop the probe worker and close the history file"""
+        with self._worker_lock:
+            if self._worker is not None:
+                try:
+                    self._worker.stdin.write('{"op": "exit"}\n')
+                    self._worker.stdin.flush()
+                    self._worker.wait(timeout=30)
+                except (OSError, subprocess.TimeoutExpired):
+                    _signal_group(self._worker)
+                self._worker = None
+
+        with self._history_lock:
+            if self._history_fp is not None:
+                self._history_fp.close()
+                self._history_fp = None
+
+    def _start_probe_worker(self):
+        """Launch nccl_probe_worker.py once across all hosts"""
+        worker_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "nccl_probe_worker.py")
+        cmd = [
+            "mpirun",
+            "--allow-run-as-root",
+            "--hostfile", self.hostfile,
+            "-np", str(len(self.hosts) * self.gpus_per_node),
+            "--bind-to", "none",
+            "--map-by", "slot",
+            "-mca", "pml", "ob1",
+            "-mca", "btl", "^openib",
+            "-x", "NCCL_DEBUG=WARN",
+            "-x", "NCCL_IB_DISABLE=0",
+            "-x", "LD_LIBRARY_PATH",
+            "python3", worker_script,
+            "--master-addr", self.hosts[0],
+            "--gpus-per-node", str(self.gpus_per_node),
+        ]
+
+        log_file = os.path.join(self.output_dir, f"probe_worker_{self._run_id}.log")
+        logger.info(f"Starting persistent probe worker on {len(self.hosts)} nodes (log: {log_file})")
+        with open(log_file, 'w') as log:
+            self._worker = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=log,
+                text=True,
+                bufsize=1,
+                start_new_session=True
+            )
+
+    def _run_persistent_test(self, nodes: List[str], result: Dict[str, Any]) -> Tuple[List[float], bool]:
+        """Run one subset through the persistent probe worker"""
+        with self._worker_lock:
+            if self._worker is None:
+                self._start_probe_worker()
+            worker = self._worker
+
+            request = {"op": "test", "nodes": [self._host_index[node] for node in nodes]}
+            worker.stdin.write(json.dumps(request) + "\n")
+            worker.stdin.flush()
+
+            # A hung collective hangs the whole worker, so kill it and start over next time
+            watchdog, expired = _start_watchdog(worker, self.TEST_TIMEOUT)
+            probe = None
+            try:
+                for line in worker.stdout:
+                    if line.startswith(PROBE_RESULT_PREFIX):
+                        probe = json.loads(line[len(PROBE_RESULT_PREFIX):])
+                        break
+            finally:
+                watchdog.cancel()
+
+            if expired.is_set() or probe is None:
+                # Dead (or killed just after answering): start a new one next time
+                self._worker = None
+                return_code = worker.wait()
+                if expired.is_set():
+                    raise subprocess.TimeoutExpired(worker.args, self.TEST_TIMEOUT)
+                raise RuntimeError(f"Probe worker exited with code {return_code}")
+
+        result["return_code"] = 0
+        result["success"] = True
+        return [probe["busbw_gb_s"]], False
+
+    def _stream_mpirun(self, cmd: List[str], output_file: str,
+                       result: Dict[str, Any]) -> Tuple[Sequence[bytes], bool]:
+        """Run one mpirun test, streaming its output and stopping early"""
+        samples = deque(maxlen=20)
+        nccl_failure = False
+        early_stop = False
+        start = time.monotonic()
+
+        # Own session so the whole launch tree (ssh/orted) can be signalled
+        with open(output_file, 'wb') as f, subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            start_new_session=True
+        ) as process:
+            # Reading stdout blocks, so a timer kills tests that hang
+            watchdog, expired = _start_watchdog(process, self.TEST_TIMEOUT)
+            try:
+                # Stream output and stop as soon as the outcome is known
+                for line in process.stdout:
+                    f.write(line)
+
+                    if _FAILURE_RE.search(line):
+                        nccl_failure = True
+                        _signal_group(process, signal.SIGTERM)
+                        break
+
+                    match = _BW_RE.match(line)
+                    if match:
+                        samples.append(match.group(1))
+                        if (len(samples) >= self.EARLY_STOP_SAMPLES and
+                                time.monotonic() - start > self.EARLY_STOP_SECONDS):
+                            early_stop = True
+                            _signal_group(process, signal.SIGTERM)
+                            break
+
+                process.wait()
+            finally:
+                watchdog.cancel()
+
+        # A deliberate stop that needed the watchdog's SIGKILL still has its outcome
+        if expired.is_set() and not (early_stop or nccl_failure):
+            raise subprocess.TimeoutExpired(cmd, self.TEST_TIMEOUT)
+
+        result["return_code"] = process.returncode
+        result["early_stop"] = early_stop
+        result["success"] = early_stop or (process.returncode == 0 and not nccl_failure)
+        if nccl_failure:
+            result["error"] = "NCCL failure reported"
+
+        return samples, nccl_failure
 
     def _run_nccl_test(self, nodes: List[str], test_name: str = "bisection") -> Dict[str, Any]:
-        """Run NCCL test on subset of nodes"""
-        print(f"\n{'='*70}")
-        print(f"Testing {len(nodes)} nodes: {', '.join(nodes[:3])}{'...' if len(nodes) > 3 else ''}")
-        print(f"{'='*70}")
+        """Run NCCL test on subset of nodes (memoized per node set)"""
+        key = frozenset(nodes)
+        if key in self._result_cache:
+            logger.info(f"Reusing earlier result for {len(nodes)} nodes: "
+                        f"{', '.join(nodes[:3])}{'...' if len(nodes) > 3 else ''}")
+            return self._result_cache[key]
+
+        token = _current_test.set(test_name)
+
+        logger.info("")
+        logger.info(f"{'='*70}")
+        logger.info(f"Testing {len(nodes)} nodes: {', '.join(nodes[:3])}{'...' if len(nodes) > 3 else ''}")
+        logger.info(f"{'='*70}")
 
-        temp_hostfile = self._create_temp_hostfile(nodes)
         total_procs = len(nodes) * self.gpus_per_node
 
         output_file = os.path.join(
             self.output_dir,
-            f"nccl_{test_name}_{len(nodes)}nodes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+            f"nccl_{test_name}_{len(nodes)}nodes_{self._run_id}_{next(self._seq):04d}.txt"
         )
 
         # Run NCCL all_reduce test
         cmd = [
             "mpirun",
             "--allow-run-as-root",
-            "--hostfile", temp_hostfile,
+            "--host", ",".join(f"{node}:{self.gpus_per_node}" for node in nodes),
             "-np", str(total_procs),
             "--bind-to", "none",
             "--map-by", "slot",
@@ -97,12 +400,13 @@ class BisectionNodeTester:
             "-x", "NCCL_IB_DISABLE=0",
             "-x", "LD_LIBRARY_PATH",
             "/usr/local/bin/all_reduce_perf",
-            "-b", "1G",  # Test with 1GB size for speed
+            "-b", "128M",  # Short large-message sweep: 128M, 512M
             "-e", "1G",
-            "-f", "2",
+            "-f", "4",
             "-g", "1",
             "-c", "1",
-            "-n", "20",  # Fewer iterations for speed
+            "-n", "5",  # Few iterations are enough for a good/bad decision
+            "-w", "2",
         ]
 
         result = {
@@ -114,82 +418,122 @@ class BisectionNodeTester:
         }
 
         try:
-            print(f"Running: {' '.join(cmd[:10])}... (full command logged)")
-
-            with open(output_file, 'w') as f:
-                process = subprocess.run(
-                    cmd,
-                    stdout=f,
-                    stderr=subprocess.STDOUT,
-                    timeout=300,  # 5 min timeout
-                    text=True
-                )
-
-                result["return_code"] = process.returncode
-                result["success"] = (process.returncode == 0)
-
-            # Parse bandwidth from output
-            bandwidth = self._parse_bandwidth(output_file)
+            if self.persistent:
+                samples, nccl_failure = self._run_persistent_test(nodes, result)
+            else:
+                logger.info(f"Running: {' '.join(cmd[:10])}... (full command logged)")
+                samples, nccl_failure = self._stream_mpirun(cmd, output_file, result)
+
+            bandwidth = self._parse_bandwidth(samples)
             result["bandwidth_gb_s"] = bandwidth
 
             # Determine if this is a "good" result
-            if bandwidth and self.threshold_gb_s:
+            if nccl_failure:
+                result["is_good"] = False
+            elif bandwidth and self.threshold_gb_s:
                 result["is_good"] = bandwidth >= self.threshold_gb_s
             else:
                 result["is_good"] = result["success"]
 
             status = "✓ GOOD" if result.get("is_good") else "✗ BAD"
             bw_str = f"{bandwidth:.2f} GB/s" if bandwidth else "N/A"
-            print(f"{status} - Bandwidth: {bw_str}")
+            logger.info(f"{status} - Bandwidth: {bw_str}")
 
         except subprocess.TimeoutExpired:
             result["error"] = "Test timeout"
             result["is_good"] = False
-            print("✗ TIMEOUT")
+            logger.error("✗ TIMEOUT")
         except Exception as e:
             result["error"] = str(e)
             result["is_good"] = False
-            print(f"✗ ERROR: {e}")
+            logger.error(f"✗ ERROR: {e}")
 
         self.test_history.append(result)
+        self._result_cache[key] = result
 
-        # Cleanup temp hostfile
-        if os.path.exists(temp_hostfile):
-            os.remove(temp_hostfile)
+        with self._history_lock:
+            if self._history_fp is None:
+                self._history_fp = open(self.history_file, 'ab')
+            self._history_fp.write(_dumps(result) + b"\n")
+            self._history_fp.flush()
+
+        _current_test.reset(token)
 
         return result
 
-    def _parse_bandwidth(self, output_file: str) -> float:
-        """Parse bandwidth from NCCL test output"""
+    def _write_history_parquet(self) -> str:
+        """
+        Write test_history as a columnar Parquet file
+        Returns its path, or None when pyarrow is not installed
+        """
+        if pa is None:
+            return None
+
+        columns = ["timestamp", "test_name", "node_count", "nodes", "bandwidth_gb_s",
+                   "success", "is_good", "return_code"]
+        table = pa.table({
+            column: [result.get(column) for result in self.test_history]
+            for column in columns
+        })
+
+        path = os.path.join(self.output_dir, f"{self.HISTORY_PREFIX}_history_{self._run_id}.parquet")
+        pq.write_table(table, path, compression="zstd")
+        return path
+
+    def _parse_bandwidth(self, samples: Sequence[Any]) -> float:
+        """Parse bandwidth from busbw values captured in NCCL test output"""
         try:
-            with open(output_file, 'r') as f:
-                content = f.read()
+            # Convert straight into a preallocated array, no intermediate list
+            arr = np.fromiter(samples, dtype=np.float64, count=len(samples))
+            # Return peak of the sweep - it reflects what the nodes can sustain
+            return float(arr.max()) if arr.size else None
 
-            # Look for "Avg bus bandwidth" line
-            import re
-            # Pattern: size count type redop time algbw busbw
-            pattern = r'^\s*\d+\s+\d+\s+\w+\s+\w+\s+([\d.]+)\s+([\d.]+)\s+([\d.]+)'
+        except Exception as e:
+            logger.warning(f"Failed to parse bandwidth: {e}")
 
-            bandwidths = []
-            for line in content.split('\n'):
-                match = re.search(pattern, line)
-                if match:
-                    busbw = float(match.group(3))
-                    bandwidths.append(busbw)
+        return None
 
-            if bandwidths:
-                # Return average of all measurements
-                return np.mean(bandwidths)
 
-        except Exception as e:
-            print(f"Warning: Failed to parse bandwidth: {e}")
+class BisectionNodeTester(NCCLProbe):
+    """
+    Binary search based node testing to identify slow nodes
 
-        return None
+    Algorithm:
+    1. Test all nodes together - if good, exit
+    2. If bad, split into two halves, test each half
+    3. For bad half, recursively split and test
+    4. Continue until individual bad nodes are identified
+    """
 
-    def _bisect_test(self, nodes: List[str], depth: int = 0) -> Set[str]:
+    HISTORY_PREFIX = "bisection"
+
+    def __init__(self, hostfile: str, gpus_per_node: int = 8,
+                 threshold_gb_s: float = None, output_dir: str = "./results",
+                 single_fault_deficit: float = None, group_testing: bool = False,
+                 persistent: bool = False):
+        super().__init__(hostfile, gpus_per_node, threshold_gb_s, output_dir, persistent)
+        self.single_fault_deficit = single_fault_deficit
+        self.group_testing = group_testing
+        self.bad_nodes = set()
+        self.good_nodes = set()
+
+    def _looks_like_single_fault(self, result: Dict[str, Any]) -> bool:
+        """Check if a failed group is only slightly below threshold"""
+        bandwidth = result.get("bandwidth_gb_s")
+        if not (self.single_fault_deficit and self.threshold_gb_s and bandwidth):
+            return False
+        return bandwidth >= self.threshold_gb_s * (1 - self.single_fault_deficit)
+
+    def _bisect_test(self, nodes: List[str], depth: int = 0,
+                     known_bad: bool = False, single_fault: bool = False) -> Set[str]:
         """
         Recursively test node subsets using binary search
         Returns set of bad nodes
+
+        known_bad: the group must contain a bad node (its parent failed and its
+                   sibling tested clean), so the group-level test is skipped
+        single_fault: assume exactly one bad node, so once it is found in the
+                      left half the right half is not tested
         """
         indent = "  " * depth
 
@@ -198,163 +542,344 @@ class BisectionNodeTester:
 
         # Base case: single node
         if len(nodes) == 1:
+            if known_bad:
+                logger.info(f"{indent}→ Node {nodes[0]} is BAD (sibling group is clean)")
+                return {nodes[0]}
+
             result = self._run_nccl_test(nodes, f"single_node_depth{depth}")
             if not result.get("is_good"):
-                print(f"{indent}→ Node {nodes[0]} is BAD")
+                logger.info(f"{indent}→ Node {nodes[0]} is BAD")
                 return {nodes[0]}
             else:
-                print(f"{indent}→ Node {nodes[0]} is GOOD")
+                logger.info(f"{indent}→ Node {nodes[0]} is GOOD")
+                self.good_nodes.add(nodes[0])
                 return set()
 
-        # Test current group
-        result = self._run_nccl_test(nodes, f"group_depth{depth}")
+        if known_bad:
+            logger.info(f"{indent}→ Group of {len(nodes)} nodes must contain a bad node, splitting...")
+        else:
+            # Test current group
+            result = self._run_nccl_test(nodes, f"group_depth{depth}")
 
-        if result.get("is_good"):
-            # All nodes in this group are good
-            print(f"{indent}→ All {len(nodes)} nodes are GOOD")
-            self.good_nodes.update(nodes)
-            return set()
+            if result.get("is_good"):
+                # All nodes in this group are good
+                logger.info(f"{indent}→ All {len(nodes)} nodes are GOOD")
+                self.good_nodes.update(nodes)
+                return set()
 
-        # Group has issues - split and recurse
-        print(f"{indent}→ Group of {len(nodes)} nodes has issues, splitting...")
+            # Group has issues - split and recurse
+            logger.info(f"{indent}→ Group of {len(nodes)} nodes has issues, splitting...")
+            single_fault = single_fault or self._looks_like_single_fault(result)
 
         mid = len(nodes) // 2
         left_nodes = nodes[:mid]
         right_nodes = nodes[mid:]
 
-        print(f"{indent}Testing left half ({len(left_nodes)} nodes)...")
-        left_bad = self._bisect_test(left_nodes, depth + 1)
+        logger.info(f"{indent}Testing left half ({len(left_nodes)} nodes)...")
+        left_bad = self._bisect_test(left_nodes, depth + 1, single_fault=single_fault)
+
+        if not left_bad and self.good_nodes.issuperset(left_nodes):
+            # Parent failed but left half is clean: the fault lives in the right half
+            logger.info(f"{indent}Left half is clean, bisecting right half ({len(right_nodes)} nodes)...")
+            return self._bisect_test(right_nodes, depth + 1, known_bad=True,
+                                     single_fault=single_fault)
 
-        print(f"{indent}Testing right half ({len(right_nodes)} nodes)...")
-        right_bad = self._bisect_test(right_nodes, depth + 1)
+        if left_bad and single_fault:
+            logger.info(f"{indent}Single fault found in left half, skipping right half")
+            return left_bad
+
+        logger.info(f"{indent}Testing right half ({len(right_nodes)} nodes)...")
+        right_bad = self._bisect_test(right_nodes, depth + 1, single_fault=single_fault)
 
         return left_bad | right_bad
 
+    def _group_test(self, nodes: List[str], expected_faults: int = None) -> Set[str]:
+        """
+        Adaptive group testing for clusters with several bad nodes
+
+        Each round randomly partitions the nodes into ~sqrt(N) groups of
+        ~sqrt(N) nodes, tested in parallel. A node stays suspect only if every
+        group it was in failed; bisection then runs on the suspects alone.
+        Returns set of bad nodes
+        """
+        if len(nodes) < 4:
+            return self._bisect_test(nodes)
+
+        result = self._run_nccl_test(nodes, "group_all")
+        if result.get("is_good"):
+            logger.info(f"→ All {len(nodes)} nodes are GOOD")
+            self.good_nodes.update(nodes)
+            return set()
+
+        group_size = math.ceil(math.sqrt(len(nodes)))
+        rounds = max(2, expected_faults or 0)
+        suspects = set(nodes)
+
+        with ThreadPoolExecutor(max_workers=math.ceil(len(nodes) / group_size)) as executor:
+            for round_num in range(1, rounds + 1):
+                shuffled = random.sample(nodes, len(nodes))
+                groups = [shuffled[i:i + group_size] for i in range(0, len(shuffled), group_size)]
+                # Groups without suspects were already cleared
+                groups = [group for group in groups if suspects.intersection(group)]
+                logger.info(f"Group testing round {round_num}/{rounds}: "
+                            f"{len(groups)} groups of ~{group_size} nodes")
+
+                futures = {
+                    executor.submit(self._run_nccl_test, group, f"grouptest_r{round_num}_g{i}"): group
+                    for i, group in enumerate(groups)
+                }
+                for future, group in futures.items():
+                    if future.result().get("is_good"):
+                        suspects.difference_update(group)
+                        self.good_nodes.update(group)
+
+        if not suspects:
+            logger.info("→ No suspects left after group testing")
+            return set()
+
+        # The full cluster failed, so the suspects must hold the bad node(s)
+        logger.info(f"→ {len(suspects)} suspect nodes remain, bisecting...")
+        return self._bisect_test([node for node in nodes if node in suspects], 1, known_bad=True)
+
     def run_bisection_detection(self) -> Dict[str, Any]:
         """
         Run binary search based slow node detection
         """
-        print("\n" + "="*70)
-        print("BINARY SEARCH SLOW NODE DETECTION")
-        print("="*70)
-        print(f"Total nodes: {len(self.hosts)}")
-        print(f"GPUs per node: {self.gpus_per_node}")
-        print(f"Threshold: {self.threshold_gb_s} GB/s" if self.threshold_gb_s else "Threshold: Auto")
-        print("")
+        logger.info("\n" + "="*70)
+        logger.info("BINARY SEARCH SLOW NODE DETECTION")
+        logger.info("="*70)
+        logger.info(f"Total nodes: {len(self.hosts)}")
+        logger.info(f"GPUs per node: {self.gpus_per_node}")
+        logger.info(f"Threshold: {self.threshold_gb_s} GB/s" if self.threshold_gb_s else "Threshold: Auto")
+        logger.info("")
 
         # If no threshold set, run a quick baseline test to establish it
         if not self.threshold_gb_s:
-            print("Running baseline test to establish threshold...")
+            logger.info("Running baseline test to establish threshold...")
+            # Cached, so bisection reuses this sweep if it hits the same pair
             baseline = self._run_nccl_test(self.hosts[:2], "baseline")  # Test 2 nodes
+            if not baseline["success"]:
+                # Its cached result must not later count as a good pair
+                reason = baseline.get("error") or f"return code {baseline.get('return_code')}"
+                raise RuntimeError(f"Baseline pair {', '.join(self.hosts[:2])} failed ({reason}); "
+                                   f"fix or exclude these nodes, or pass --threshold")
             if baseline.get("bandwidth_gb_s"):
                 # Set threshold to 80% of baseline
                 self.threshold_gb_s = baseline["bandwidth_gb_s"] * 0.8
-                print(f"Threshold set to: {self.threshold_gb_s:.2f} GB/s (80% of baseline)")
+                baseline["is_good"] = True
+                logger.info(f"Threshold set to: {self.threshold_gb_s:.2f} GB/s (80% of baseline)")
 
         # Start bisection
-        start_time = datetime.now()
-        bad_nodes = self._bisect_test(self.hosts)
-        end_time = datetime.now()
+        start_time = time.monotonic()
+        if self.group_testing:
+            bad_nodes = self._group_test(self.hosts)
+        else:
+            bad_nodes = self._bisect_test(self.hosts)
+        duration = time.monotonic() - start_time
 
         # Generate report
         report = {
             "timestamp": datetime.now().isoformat(),
             "total_nodes": len(self.hosts),
             "total_tests": len(self.test_history),
-            "duration_seconds": (end_time - start_time).total_seconds(),
+            "duration_seconds": duration,
             "threshold_gb_s": self.threshold_gb_s,
             "bad_nodes": list(bad_nodes),
             "good_nodes": list(self.good_nodes),
-            "test_history": self.test_history,
+            "test_history_file": self.history_file,
         }
 
+        # Keep the per-test table out of the JSON when it can go to Parquet
+        history_parquet = self._write_history_parquet()
+        if history_parquet:
+            report["test_history_parquet"] = history_parquet
+        else:
+            report["test_history"] = self.test_history
+
         # Save report
         report_file = os.path.join(
             self.output_dir,
-            f"bisection_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            f"bisection_report_{self._run_id}.json"
         )
-        with open(report_file, 'w') as f:
-            json.dump(report, f, indent=2)
-
-        print("\n" + "="*70)
-        print("BISECTION DETECTION COMPLETE")
-        print("="*70)
-        print(f"Total tests run: {len(self.test_history)}")
-        print(f"Duration: {report['duration_seconds']:.1f} seconds")
-        print(f"Bad nodes found: {len(bad_nodes)}")
+        with open(report_file, 'wb') as f:
+            f.write(_dumps(report, indent=True))
+
+        logger.info("\n" + "="*70)
+        logger.info("BISECTION DETECTION COMPLETE")
+        logger.info("="*70)
+        logger.info(f"Total tests run: {len(self.test_history)}")
+        logger.info(f"Duration: {report['duration_seconds']:.1f} seconds")
+        logger.info(f"Bad nodes found: {len(bad_nodes)}")
         if bad_nodes:
             for node in bad_nodes:
-                print(f"  ✗ {node}")
+                logger.info(f"  ✗ {node}")
         else:
-            print("  ✓ No bad nodes detected!")
-        print(f"\nReport saved to: {report_file}")
+            logger.info("  ✓ No bad nodes detected!")
+        logger.info(f"\nReport saved to: {report_file}")
 
         return report
 
 
-class PairwiseNodeTester:
+class PairwiseNodeTester(NCCLProbe):
     """
     Pairwise node testing to identify communication issues between specific node pairs
     Inspired by Google Cloud Cluster Health Scanner
     """
 
-    def __init__(self, hostfile: str, gpus_per_node: int = 8, output_dir: str = "./results"):
-        self.hostfile = hostfile
-        self.gpus_per_node = gpus_per_node
-        self.output_dir = output_dir
-        self.hosts = self._parse_hostfile()
+    HISTORY_PREFIX = "pairwise"
+
+    def __init__(self, hostfile: str, gpus_per_node: int = 8, output_dir: str = "./results",
+                 persistent: bool = False):
+        super().__init__(hostfile, gpus_per_node, output_dir=output_dir, persistent=persistent)
         self.pairwise_results = {}
 
-        os.makedirs(output_dir, exist_ok=True)
+    @staticmethod
+    def _round_robin_rounds(hosts: List[str]) -> Iterator[List[Tuple[str, str]]]:
+        """
+        Circle-method 1-factorization of the host list
 
-    def _parse_hostfile(self) -> List[str]:
-        """Parse MPI hostfile"""
-        hosts = []
-        with open(self.hostfile, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#'):
-                    host = line.split()[0]
-                    hosts.append(host)
-        return hosts
-
-    def run_pairwise_tests(self, max_pairs: int = None) -> Dict[str, Any]:
+        Host 0 stays fixed while the others rotate, yielding N-1 rounds of N/2
+        node-disjoint pairs (one host sits out each round when N is odd).
+        Every pair appears exactly once across all rounds.
         """
-        Run NCCL tests on all pairs of nodes
+        order = {host: i for i, host in enumerate(hosts)}
+        players = list(hosts)
+        if len(players) % 2:
+            players.append(None)  # Bye
+
+        n = len(players)
+        for _ in range(n - 1):
+            pairs = []
+            for i in range(n // 2):
+                a, b = players[i], players[n - 1 - i]
+                if a is None or b is None:
+                    continue
+                pairs.append((a, b) if order[a] < order[b] else (b, a))
+            yield pairs
+            players = [players[0], players[-1]] + players[1:-1]
+
+    def _sample_pairs(self, max_pairs: int) -> List[Tuple[str, str]]:
         """
-        print("\n" + "="*70)
-        print("PAIRWISE NODE TESTING")
-        print("="*70)
-
-        # Generate all pairs
-        all_pairs = list(itertools.combinations(self.hosts, 2))
-
-        if max_pairs and len(all_pairs) > max_pairs:
-            print(f"Limiting to {max_pairs} pairs (out of {len(all_pairs)} total)")
-            # Randomly sample pairs
-            import random
-            all_pairs = random.sample(all_pairs, max_pairs)
-        else:
-            print(f"Testing {len(all_pairs)} node pairs")
+        Pick max_pairs distinct pairs, always pairing the least-tested nodes
 
-        tester = BisectionNodeTester(
-            self.hostfile,
-            self.gpus_per_node,
-            output_dir=self.output_dir
-        )
+        Every node ends up in about 2*max_pairs/N pairs, and the full C(N,2)
+        pair list is never built.
+        """
+        order = {host: i for i, host in enumerate(self.hosts)}
+        # (degree, random tie-break, host)
+        heap = [(0, random.random(), host) for host in self.hosts]
+        heapq.heapify(heap)
+
+        sampled = set()
+        pairs = []
+        while len(pairs) < max_pairs and len(heap) > 1:
+            deg_a, _, a = heapq.heappop(heap)
+
+            # Lowest-degree partner that a has not been paired with yet
+            skipped = []
+            partner = None
+            while heap:
+                entry = heapq.heappop(heap)
+                if frozenset((a, entry[2])) not in sampled:
+                    partner = entry
+                    break
+                skipped.append(entry)
+            for entry in skipped:
+                heapq.heappush(heap, entry)
+
+            if partner is None:
+                # a is already paired with every other node
+                continue
+
+            deg_b, _, b = partner
+            sampled.add(frozenset((a, b)))
+            pairs.append((a, b) if order[a] < order[b] else (b, a))
+            heapq.heappush(heap, (deg_a + 1, random.random(), a))
+            heapq.heappush(heap, (deg_b + 1, random.random(), b))
+
+        return pairs
+
+    @staticmethod
+    def _schedule_rounds(pairs: List[Tuple[str, str]]) -> List[List[Tuple[str, str]]]:
+        """Greedily pack pairs into rounds of node-disjoint pairs"""
+        rounds = []
+        busy = []
+        for a, b in pairs:
+            for round_pairs, used in zip(rounds, busy):
+                if a not in used and b not in used:
+                    round_pairs.append((a, b))
+                    used.update((a, b))
+                    break
+            else:
+                rounds.append([(a, b)])
+                busy.append({a, b})
+        return rounds
 
-        for i, (node1, node2) in enumerate(all_pairs, 1):
-            print(f"\n[{i}/{len(all_pairs)}] Testing pair: {node1} ↔ {node2}")
+    def run_pairwise_tests(self, max_pairs: int = None,
+                           probe: NCCLProbe = None) -> Dict[str, Any]:
+        """
+        Run NCCL tests on all pairs of nodes
 
-            result = tester._run_nccl_test([node1, node2], f"pair_{i}")
+        Pair tests run through this tester unless another probe (e.g. the
+        bisection tester) is passed in to share its result cache and history.
 
-            pair_key = f"{node1}↔{node2}"
-            self.pairwise_results[pair_key] = {
-                "nodes": [node1, node2],
-                "bandwidth_gb_s": result.get("bandwidth_gb_s"),
-                "success": result.get("success"),
-                "timestamp": result.get("timestamp"),
-            }
+        Pairs are scheduled as a round-robin tournament: each round is a set of
+        node-disjoint pairs that run concurrently, so N nodes need N-1 rounds
+        instead of C(N,2) sequential tests.
+        """
+        logger.info("\n" + "="*70)
+        logger.info("PAIRWISE NODE TESTING")
+        logger.info("="*70)
+
+        total_pairs = len(self.hosts) * (len(self.hosts) - 1) // 2
+
+        if max_pairs and total_pairs > max_pairs:
+            logger.info(f"Limiting to {max_pairs} pairs (out of {total_pairs} total)")
+            # Sample pairs so that every node is covered evenly
+            rounds = self._schedule_rounds(self._sample_pairs(max_pairs))
+            total_pairs = sum(len(pairs) for pairs in rounds)
+            num_rounds = len(rounds)
+        else:
+            rounds = self._round_robin_rounds(self.hosts)
+            num_rounds = len(self.hosts) - 1 if len(self.hosts) % 2 == 0 else len(self.hosts)
+            logger.info(f"Testing {total_pairs} node pairs in {num_rounds} rounds")
+
+        probe = probe or self
+
+        pair_index = 0
+        with ThreadPoolExecutor(max_workers=max(1, len(self.hosts) // 2)) as executor:
+            for round_num, pairs in enumerate(rounds, 1):
+                if not pairs:
+                    continue
+                logger.info(f"\n--- Round {round_num}/{num_rounds}: {len(pairs)} pairs in parallel ---")
+
+                futures = {}
+                for node1, node2 in pairs:
+                    pair_index += 1
+                    logger.info(f"[{pair_index}/{total_pairs}] Testing pair: {node1} ↔ {node2}")
+                    future = executor.submit(
+                        probe._run_nccl_test, [node1, node2], f"pair_{pair_index}"
+                    )
+                    futures[future] = (node1, node2)
+
+                # Abort the remaining pairs of this round if any test crashed
+                done, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+                for future in done:
+                    if future.exception():
+                        for pending in not_done:
+                            pending.cancel()
+                        raise future.exception()
+
+                for future, (node1, node2) in futures.items():
+                    result = future.result()
+
+                    pair_key = f"{node1}↔{node2}"
+                    self.pairwise_results[pair_key] = {
+                        "nodes": [node1, node2],
+                        "bandwidth_gb_s": result.get("bandwidth_gb_s"),
+                        "success": result.get("success"),
+                        "timestamp": result.get("timestamp"),
+                    }
 
         # Analyze results
         analysis = self._analyze_pairwise_results()
@@ -362,22 +887,23 @@ class PairwiseNodeTester:
         # Save report
         report = {
             "timestamp": datetime.now().isoformat(),
-            "total_pairs": len(all_pairs),
+            "total_pairs": total_pairs,
+            "test_history_file": probe.history_file,
             "pairwise_results": self.pairwise_results,
             "analysis": analysis,
         }
 
         report_file = os.path.join(
             self.output_dir,
-            f"pairwise_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            f"pairwise_report_{self._run_id}.json"
         )
-        with open(report_file, 'w') as f:
-            json.dump(report, f, indent=2)
+        with open(report_file, 'wb') as f:
+            f.write(_dumps(report, indent=True))
 
-        print("\n" + "="*70)
-        print("PAIRWISE TESTING COMPLETE")
-        print("="*70)
-        print(f"Report saved to: {report_file}")
+        logger.info("\n" + "="*70)
+        logger.info("PAIRWISE TESTING COMPLETE")
+        logger.info("="*70)
+        logger.info(f"Report saved to: {report_file}")
 
         self._print_analysis(analysis)
 
@@ -385,45 +911,42 @@ class PairwiseNodeTester:
 
     def _analyze_pairwise_results(self) -> Dict[str, Any]:
         """Analyze pairwise test results to find problematic nodes"""
-        node_stats = defaultdict(lambda: {"bandwidths": [], "failures": 0, "tests": 0})
-
-        for pair_key, result in self.pairwise_results.items():
-            nodes = result["nodes"]
-            bw = result.get("bandwidth_gb_s")
-            success = result.get("success")
-
-            for node in nodes:
-                node_stats[node]["tests"] += 1
-                if bw:
-                    node_stats[node]["bandwidths"].append(bw)
-                if not success:
-                    node_stats[node]["failures"] += 1
-
-        # Calculate statistics
         analysis = {
             "node_statistics": {},
             "problematic_nodes": [],
         }
 
-        all_avg_bw = []
-        for node, stats in node_stats.items():
-            if stats["bandwidths"]:
-                avg_bw = np.mean(stats["bandwidths"])
-                std_bw = np.std(stats["bandwidths"])
-                all_avg_bw.append(avg_bw)
+        results = list(self.pairwise_results.values())
+        if not results:
+            return analysis
+
+        # Flat (node_idx0, node_idx1, bw, success) arrays, reduced per node id
+        # by a JIT kernel when numba is available (numpy bincount otherwise)
+        node_ids = self._host_index
+        idx0 = np.fromiter((node_ids[r["nodes"][0]] for r in results), dtype=np.intp, count=len(results))
+        idx1 = np.fromiter((node_ids[r["nodes"][1]] for r in results), dtype=np.intp, count=len(results))
+        bws = np.fromiter((r.get("bandwidth_gb_s") or np.nan for r in results),
+                          dtype=np.float64, count=len(results))
+        oks = np.fromiter((bool(r.get("success")) for r in results), dtype=np.bool_, count=len(results))
+
+        tests, failures, count, mean, m2 = _accumulate_pairs(idx0, idx1, bws, oks, len(node_ids))
+        std = np.sqrt(m2 / np.maximum(count, 1))
 
+        for node, i in node_ids.items():
+            if count[i]:
                 analysis["node_statistics"][node] = {
-                    "average_bandwidth_gb_s": float(avg_bw),
-                    "std_bandwidth_gb_s": float(std_bw),
-                    "failure_count": stats["failures"],
-                    "total_tests": stats["tests"],
-                    "failure_rate": stats["failures"] / stats["tests"] if stats["tests"] > 0 else 0,
+                    "average_bandwidth_gb_s": float(mean[i]),
+                    "std_bandwidth_gb_s": float(std[i]),
+                    "failure_count": int(failures[i]),
+                    "total_tests": int(tests[i]),
+                    "failure_rate": float(failures[i] / tests[i]),
                 }
 
         # Identify problematic nodes (those with below average performance)
-        if all_avg_bw:
-            mean_bw = np.mean(all_avg_bw)
-            std_bw = np.std(all_avg_bw)
+        node_means = mean[count > 0]
+        if node_means.size:
+            mean_bw = node_means.mean()
+            std_bw = node_means.std()
             threshold = mean_bw - 2 * std_bw  # 2 sigma
 
             analysis["overall_mean_bandwidth"] = float(mean_bw)
@@ -443,22 +966,22 @@ class PairwiseNodeTester:
 
     def _print_analysis(self, analysis: Dict[str, Any]):
         """Print analysis results"""
-        print("\nNode Performance Summary:")
-        print("-" * 70)
+        logger.info("\nNode Performance Summary:")
+        logger.info("-" * 70)
 
         if "node_statistics" in analysis:
             for node, stats in sorted(analysis["node_statistics"].items()):
                 bw = stats["average_bandwidth_gb_s"]
                 failures = stats["failure_count"]
                 total = stats["total_tests"]
-                print(f"{node:30s} | BW: {bw:6.2f} GB/s | Failures: {failures}/{total}")
+                logger.info(f"{node:30s} | BW: {bw:6.2f} GB/s | Failures: {failures}/{total}")
 
         if analysis.get("problematic_nodes"):
-            print("\n⚠ Problematic Nodes Detected:")
+            logger.info("\n⚠ Problematic Nodes Detected:")
             for item in analysis["problematic_nodes"]:
-                print(f"  ✗ {item['node']}: {item['reason']} ({item['average_bandwidth_gb_s']:.2f} GB/s)")
+                logger.info(f"  ✗ {item['node']}: {item['reason']} ({item['average_bandwidth_gb_s']:.2f} GB/s)")
         else:
-            print("\n✓ No problematic nodes detected!")
+            logger.info("\n✓ No problematic nodes detected!")
 
 
 def main():
@@ -489,64 +1012,90 @@ Examples:
                        help="Output directory")
     parser.add_argument("--max-pairs", type=int, default=None,
                        help="Maximum number of pairs to test (for large clusters)")
+    parser.add_argument("--group-testing", action="store_true",
+                       help="Narrow down suspects with parallel random group tests "
+                            "before bisecting (faster when several nodes are bad)")
+    parser.add_argument("--persistent", action="store_true",
+                       help="Keep one NCCL job (nccl_probe_worker.py, needs PyTorch) alive "
+                            "and test subsets as sub-groups instead of one mpirun per test")
+    parser.add_argument("--single-fault-deficit", type=float, default=None,
+                       help="Assume a single bad node when a failing group is within this "
+                            "fraction of the threshold (e.g. 0.1), halving bisection tests")
 
     args = parser.parse_args()
 
+    _setup_logging()
+
     if not os.path.exists(args.hostfile):
-        print(f"Error: Hostfile not found: {args.hostfile}")
+        logger.error(f"Error: Hostfile not found: {args.hostfile}")
         sys.exit(1)
 
     results = {}
+    bisection_tester = None
 
     # Run bisection detection
     if args.mode in ["bisection", "both"]:
-        tester = BisectionNodeTester(
+        bisection_tester = BisectionNodeTester(
             args.hostfile,
             args.gpus_per_node,
             args.threshold,
-            args.output_dir
+            args.output_dir,
+            args.single_fault_deficit,
+            args.group_testing,
+            args.persistent
         )
-        results["bisection"] = tester.run_bisection_detection()
+        try:
+            results["bisection"] = bisection_tester.run_bisection_detection()
+        except RuntimeError as e:
+            logger.error(f"Error: {e}")
+            bisection_tester.close()
+            sys.exit(2)
 
     # Run pairwise testing
     if args.mode in ["pairwise", "both"]:
         tester = PairwiseNodeTester(
             args.hostfile,
             args.gpus_per_node,
-            args.output_dir
+            args.output_dir,
+            args.persistent
         )
-        results["pairwise"] = tester.run_pairwise_tests(args.max_pairs)
+        # Reuse the bisection tester's cache (and probe worker) in "both" mode
+        results["pairwise"] = tester.run_pairwise_tests(args.max_pairs, bisection_tester)
+        tester.close()
+
+    if bisection_tester is not None:
+        bisection_tester.close()
 
     # Print final summary
-    print("\n" + "="*70)
-    print("FINAL SUMMARY")
-    print("="*70)
+    logger.info("\n" + "="*70)
+    logger.info("FINAL SUMMARY")
+    logger.info("="*70)
 
     bad_nodes = set()
 
     if "bisection" in results:
         bisect_bad = results["bisection"].get("bad_nodes", [])
         if bisect_bad:
-            print(f"\nBisection detected {len(bisect_bad)} bad nodes:")
+            logger.info(f"\nBisection detected {len(bisect_bad)} bad nodes:")
             for node in bisect_bad:
-                print(f"  ✗ {node}")
+                logger.info(f"  ✗ {node}")
             bad_nodes.update(bisect_bad)
 
     if "pairwise" in results:
         pair_bad = results["pairwise"]["analysis"].get("problematic_nodes", [])
         if pair_bad:
-            print(f"\nPairwise testing detected {len(pair_bad)} problematic nodes:")
+            logger.info(f"\nPairwise testing detected {len(pair_bad)} problematic nodes:")
             for item in pair_bad:
-                print(f"  ✗ {item['node']}: {item['reason']}")
+                logger.info(f"  ✗ {item['node']}: {item['reason']}")
                 bad_nodes.add(item['node'])
 
     if bad_nodes:
-        print(f"\n⚠ ACTION REQUIRED: Isolate these nodes from the cluster:")
+        logger.info(f"\n⚠ ACTION REQUIRED: Isolate these nodes from the cluster:")
         for node in sorted(bad_nodes):
-            print(f"  - {node}")
+            logger.info(f"  - {node}")
         sys.exit(1)
     else:
-        print("\n✓ All nodes performing well!")
+        logger.info("\n✓ All nodes performing well!")
         sys.exit(0)
 
 
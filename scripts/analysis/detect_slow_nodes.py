@@ -10,16 +10,114 @@ This tool implements several detection strategies:
 4. Time-based performance degradation detection
 """
 
-import json
 import argparse
 import sys
 import os
 import re
-from typing import Dict, List, Any, Tuple
+import io
+import mmap
+import glob
+import functools
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Tuple, Iterator
 from datetime import datetime
 from collections import defaultdict
 import numpy as np
 
+try:
+    import numba
+except ImportError:
+    numba = None
+
+from json_io import loads as _loads, dumps as _dumps
+
+
+# "Avg bus bandwidth : 234.56" summary line
+_BW_RE = re.compile(rb'Avg bus bandwidth\s*:\s*([\d.]+)')
+
+# Rank ids from NCCL_DEBUG output
+_RANK_RE = re.compile(rb'NCCL INFO.*Rank\s+(\d+)')
+
+# NCCL performance line: size count type redop time algbw busbw
+# Example: "      512     2048    float     sum      41.9    12.23    12.23"
+_PERF_RE = re.compile(
+    rb'^[ \t]+(\d+)[ \t]+(\d+)[ \t]+\w+[ \t]+\w+[ \t]+([\d.]+)[ \t]+([\d.]+)[ \t]+([\d.]+)',
+    re.MULTILINE
+)
+
+# Columnar layout of the _PERF_RE groups (patterns are bytes so they can scan mmaps)
+_PERF_DTYPE = np.dtype([
+    ('size', 'i8'),
+    ('count', 'i8'),
+    ('time', 'f8'),
+    ('algbw', 'f8'),
+    ('busbw', 'f8'),
+])
+
+# Raw logs are scanned in windows of this many bytes to bound peak memory
+_CHUNK_SIZE = 8 << 20
+
+
+def _iter_chunks(buf, chunk_size: int = _CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield newline-aligned slices of buf, so no line is split across chunks"""
+    start, size = 0, len(buf)
+    while start < size:
+        end = min(start + chunk_size, size)
+        if end < size:
+            newline = buf.rfind(b'\n', start, end)
+            if newline < 0:
+                # Line longer than a chunk: extend the window to its end
+                newline = buf.find(b'\n', end)
+            end = size if newline < 0 else newline + 1
+        yield buf[start:end]
+        start = end
+
+
+def _extract_busbw(test: Dict[str, Any]) -> np.ndarray:
+    """busbw of every result in a test, converted once and cached on the test dict"""
+    arr = test.get('_busbw_arr')
+    if arr is None:
+        results = test['results']
+        arr = np.fromiter((r['busbw_GB/s'] for r in results), dtype=np.float64, count=len(results))
+        test['_busbw_arr'] = arr
+    return arr
+
+
+def _zscore_outliers_numpy(a: np.ndarray, mean: float, std: float, threshold: float) -> np.ndarray:
+    """Indices whose |z-score| exceeds threshold"""
+    return np.flatnonzero(np.abs((a - mean) / std) > threshold)
+
+
+def _bounds_outliers_numpy(a: np.ndarray, lower: float, upper: float) -> np.ndarray:
+    """Indices outside [lower, upper]"""
+    return np.flatnonzero((a < lower) | (a > upper))
+
+
+if numba is not None:
+    # Fused single-pass kernels: no temporaries for the z-scores or masks
+    @numba.njit(cache=True)
+    def _zscore_outliers(a, mean, std, threshold):
+        out = np.empty(a.size, dtype=np.int64)
+        k = 0
+        for i in range(a.size):
+            if abs((a[i] - mean) / std) > threshold:
+                out[k] = i
+                k += 1
+        return out[:k]
+
+    @numba.njit(cache=True)
+    def _bounds_outliers(a, lower, upper):
+        out = np.empty(a.size, dtype=np.int64)
+        k = 0
+        for i in range(a.size):
+            if a[i] < lower or a[i] > upper:
+                out[k] = i
+                k += 1
+        return out[:k]
+else:
+    _zscore_outliers = _zscore_outliers_numpy
+    _bounds_outliers = _bounds_outliers_numpy
+
 
 class SlowNodeDetector:
     """Detects slow nodes from NCCL test results"""
@@ -43,8 +141,8 @@ class SlowNodeDetector:
         self.log(f"Loading results from {result_file}")
 
         if result_file.endswith('.json'):
-            with open(result_file, 'r') as f:
-                data = json.load(f)
+            with open(result_file, 'rb') as f:
+                data = _loads(f.read())
             return data
         else:
             # Parse text output
@@ -52,89 +150,84 @@ class SlowNodeDetector:
 
     def _parse_text_results(self, result_file: str) -> Dict[str, Any]:
         """Parse NCCL text output"""
-        with open(result_file, 'r') as f:
+        with open(result_file, 'rb') as f:
             content = f.read()
 
         results = {
             'tests': [],
-            'raw_output': content
+            'raw_output': content.decode(errors='replace')
         }
 
-        # Extract bandwidth results
-        # Look for patterns like: "Avg bus bandwidth : 234.56"
-        bandwidth_pattern = r'Avg bus bandwidth\s*:\s*([\d.]+)'
-        bandwidths = re.findall(bandwidth_pattern, content)
+        # Extract bandwidth results; numpy converts the captured bytes in C,
+        # the same way np.fromregex would, without re-reading the file
+        bandwidths = np.array(_BW_RE.findall(content), dtype=np.float64)
 
-        if bandwidths:
-            results['avg_bandwidth'] = [float(bw) for bw in bandwidths]
+        if bandwidths.size:
+            results['avg_bandwidth'] = bandwidths.tolist()
 
-        # Extract per-rank information from NCCL_DEBUG output
-        rank_pattern = r'NCCL INFO.*Rank\s+(\d+).*'
-        ranks = re.findall(rank_pattern, content)
+        # Extract per-rank information from NCCL_DEBUG output (sorted, deduplicated)
+        ranks = np.unique(np.array(_RANK_RE.findall(content), dtype=np.int64))
 
-        if ranks:
-            results['ranks'] = list(set(int(r) for r in ranks))
+        if ranks.size:
+            results['ranks'] = ranks.tolist()
 
         return results
 
     def parse_nccl_logs(self, log_content: str) -> List[Dict[str, Any]]:
         """Parse NCCL DEBUG logs to extract per-rank performance"""
-        entries = []
-
-        # Pattern to match NCCL performance lines
-        # Example: "      512     2048    float     sum      41.9    12.23    12.23"
-        perf_pattern = r'^\s+(\d+)\s+(\d+)\s+\w+\s+\w+\s+([\d.]+)\s+([\d.]+)\s+([\d.]+)'
-
-        for line in log_content.split('\n'):
-            match = re.search(perf_pattern, line)
-            if match:
-                size, count, time, algbw, busbw = match.groups()
-                entries.append({
-                    'size_bytes': int(size),
-                    'count': int(count),
-                    'time_us': float(time),
-                    'algbw_GB/s': float(algbw),
-                    'busbw_GB/s': float(busbw)
-                })
+        # Same single regex pass as parse_nccl_perf; numpy converts the fields,
+        # tolist() hands back plain Python ints and floats
+        keys = ('size_bytes', 'count', 'time_us', 'algbw_GB/s', 'busbw_GB/s')
+        return [dict(zip(keys, row)) for row in self.parse_nccl_perf(log_content).tolist()]
 
-        return entries
+    def parse_nccl_perf(self, log_content) -> np.ndarray:
+        """Parse NCCL performance lines into a structured array (one column per field)
 
-    def detect_outliers_zscore(self, values: List[float], threshold: float = 2.0) -> List[int]:
-        """Detect outliers using Z-score method"""
+        log_content can be str, bytes or any buffer such as an mmap; buffers are
+        scanned chunk by chunk, so only one window of matches is alive at a time.
+        """
+        if isinstance(log_content, str):
+            log_content = log_content.encode()
+        # Same conversion np.fromregex does, minus its file.read() copy
+        parts = [np.array(_PERF_RE.findall(chunk), dtype=_PERF_DTYPE) for chunk in _iter_chunks(log_content)]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=_PERF_DTYPE)
+
+    def detect_outliers_zscore(self, values: np.ndarray, threshold: float = 2.0,
+                               mean: float = None, std: float = None) -> List[int]:
+        """Detect outliers using Z-score method (mean/std are computed if not given)"""
         if len(values) < 3:
             return []
 
-        values_array = np.array(values)
-        mean = np.mean(values_array)
-        std = np.std(values_array)
+        values_array = np.asarray(values, dtype=np.float64)
+        if mean is None:
+            mean = values_array.mean()
+        if std is None:
+            std = values_array.std()
 
         if std == 0:
             return []
 
-        z_scores = np.abs((values_array - mean) / std)
-        outliers = np.where(z_scores > threshold)[0].tolist()
+        outliers = _zscore_outliers(values_array, mean, std, threshold).tolist()
 
         self.log(f"Z-score detection: mean={mean:.2f}, std={std:.2f}, outliers={outliers}")
 
         return outliers
 
-    def detect_outliers_iqr(self, values: List[float], multiplier: float = 1.5) -> List[int]:
-        """Detect outliers using IQR method"""
+    def detect_outliers_iqr(self, values: np.ndarray, multiplier: float = 1.5,
+                            q1: float = None, q3: float = None) -> List[int]:
+        """Detect outliers using IQR method (quartiles are computed if not given)"""
         if len(values) < 4:
             return []
 
-        values_array = np.array(values)
-        q1 = np.percentile(values_array, 25)
-        q3 = np.percentile(values_array, 75)
+        values_array = np.asarray(values, dtype=np.float64)
+        if q1 is None or q3 is None:
+            q1, q3 = np.percentile(values_array, [25, 75])
         iqr = q3 - q1
 
         lower_bound = q1 - multiplier * iqr
         upper_bound = q3 + multiplier * iqr
 
-        outliers = []
-        for i, val in enumerate(values):
-            if val < lower_bound or val > upper_bound:
-                outliers.append(i)
+        outliers = _bounds_outliers(values_array, lower_bound, upper_bound).tolist()
 
         self.log(f"IQR detection: Q1={q1:.2f}, Q3={q3:.2f}, IQR={iqr:.2f}, outliers={outliers}")
 
@@ -156,44 +249,44 @@ class SlowNodeDetector:
             for test in test_results['tests']:
                 if 'results' in test and test['results']:
                     # Get maximum bandwidth for each test
-                    max_bw = max(r['busbw_GB/s'] for r in test['results'])
+                    max_bw = _extract_busbw(test).max()
                     all_bandwidths.append(max_bw)
 
             if all_bandwidths:
+                # One array and one set of statistics shared by both detectors
+                bw = np.asarray(all_bandwidths, dtype=np.float64)
+                mean = bw.mean()
+                std = bw.std()
+                q1, median, q3 = np.percentile(bw, [25, 50, 75])
+
                 analysis['statistics'] = {
-                    'mean_bandwidth_GB/s': float(np.mean(all_bandwidths)),
-                    'median_bandwidth_GB/s': float(np.median(all_bandwidths)),
-                    'std_bandwidth_GB/s': float(np.std(all_bandwidths)),
-                    'min_bandwidth_GB/s': float(np.min(all_bandwidths)),
-                    'max_bandwidth_GB/s': float(np.max(all_bandwidths)),
+                    'mean_bandwidth_GB/s': float(mean),
+                    'median_bandwidth_GB/s': float(median),
+                    'std_bandwidth_GB/s': float(std),
+                    'min_bandwidth_GB/s': float(bw.min()),
+                    'max_bandwidth_GB/s': float(bw.max()),
                 }
 
                 # Detect outliers using both methods
-                zscore_outliers = self.detect_outliers_zscore(all_bandwidths)
-                iqr_outliers = self.detect_outliers_iqr(all_bandwidths)
+                zscore_outliers = self.detect_outliers_zscore(bw, mean=mean, std=std)
+                iqr_outliers = self.detect_outliers_iqr(bw, q1=q1, q3=q3)
 
                 # Combine outliers (intersection for higher confidence)
-                outlier_indices = set(zscore_outliers) & set(iqr_outliers)
+                outlier_indices = np.intersect1d(np.asarray(zscore_outliers, dtype=np.int64),
+                                                 np.asarray(iqr_outliers, dtype=np.int64))
 
-                self.log(f"Combined outliers: {outlier_indices}")
+                self.log(f"Combined outliers: {outlier_indices.tolist()}")
 
                 # Map outliers to nodes (simplified - assumes sequential node assignment)
                 if 'hosts' in test_results:
                     hosts = test_results['hosts']
                     gpus_per_node = test_results.get('gpus_per_node', 8)
 
-                    for host_idx, host in enumerate(hosts):
-                        # Check if this node has outlier GPUs
-                        node_gpu_start = host_idx * gpus_per_node
-                        node_gpu_end = node_gpu_start + gpus_per_node
-
-                        node_has_outlier = False
-                        for outlier_idx in outlier_indices:
-                            if node_gpu_start <= outlier_idx < node_gpu_end:
-                                node_has_outlier = True
-                                break
+                    # Map outlier GPU indices to host indices in one vectorized pass
+                    bad_hosts = set((outlier_indices // gpus_per_node).tolist())
 
-                        if node_has_outlier:
+                    for host_idx, host in enumerate(hosts):
+                        if host_idx in bad_hosts:
                             analysis['slow_nodes'].append({
                                 'hostname': host,
                                 'index': host_idx,
@@ -207,23 +300,20 @@ class SlowNodeDetector:
         """Analyze slow nodes from raw NCCL log output"""
         self.log(f"Analyzing raw logs from {log_file}")
 
-        with open(log_file, 'r') as f:
-            content = f.read()
+        # Parse performance entries straight from the page cache
+        with open(log_file, 'rb') as f:
+            if os.fstat(f.fileno()).st_size:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    perf = self.parse_nccl_perf(mm)
+            else:
+                perf = np.empty(0, dtype=_PERF_DTYPE)
 
-        # Parse performance entries
-        perf_entries = self.parse_nccl_logs(content)
-
-        if not perf_entries:
+        if not perf.size:
             return {
                 'error': 'No performance data found in logs',
                 'slow_nodes': []
             }
 
-        # Group by size and analyze
-        size_groups = defaultdict(list)
-        for entry in perf_entries:
-            size_groups[entry['size_bytes']].append(entry['busbw_GB/s'])
-
         analysis = {
             'timestamp': datetime.now().isoformat(),
             'performance_by_size': {},
@@ -231,82 +321,119 @@ class SlowNodeDetector:
             'summary': {}
         }
 
+        # Group by size: sort once so each size is a contiguous segment, then
+        # reduce every segment in a single reduceat call per statistic
+        order = np.argsort(perf['size'], kind='stable')
+        size_sorted = perf['size'][order]
+        busbw = perf['busbw'][order]
+        starts = np.flatnonzero(np.r_[True, size_sorted[1:] != size_sorted[:-1]])
+        sizes = size_sorted[starts]
+        counts = np.diff(np.r_[starts, busbw.size])
+        means = np.add.reduceat(busbw, starts) / counts
+        dev = busbw - np.repeat(means, counts)
+        stds = np.sqrt(np.add.reduceat(dev * dev, starts) / counts)
+        mins = np.minimum.reduceat(busbw, starts)
+        maxs = np.maximum.reduceat(busbw, starts)
+
         # Analyze each size
-        all_bw_values = []
-        for size, bandwidths in size_groups.items():
-            if len(bandwidths) >= 3:
-                analysis['performance_by_size'][str(size)] = {
-                    'mean_GB/s': float(np.mean(bandwidths)),
-                    'std_GB/s': float(np.std(bandwidths)),
-                    'min_GB/s': float(np.min(bandwidths)),
-                    'max_GB/s': float(np.max(bandwidths)),
-                }
-                all_bw_values.extend(bandwidths)
+        keep = counts >= 3
+        for i in np.flatnonzero(keep):
+            analysis['performance_by_size'][str(sizes[i])] = {
+                'mean_GB/s': float(means[i]),
+                'std_GB/s': float(stds[i]),
+                'min_GB/s': float(mins[i]),
+                'max_GB/s': float(maxs[i]),
+            }
+        # Samples of the kept sizes; the busbw column itself when every size qualifies
+        all_bw_values = busbw if keep.all() else busbw[np.repeat(keep, counts)]
 
-        if all_bw_values:
-            # Overall statistics
+        if all_bw_values.size:
+            # Overall statistics (each reduction computed once)
+            mean_bw = float(all_bw_values.mean())
+            std_bw = float(all_bw_values.std())
             analysis['summary'] = {
-                'overall_mean_GB/s': float(np.mean(all_bw_values)),
-                'overall_std_GB/s': float(np.std(all_bw_values)),
-                'coefficient_of_variation': float(np.std(all_bw_values) / np.mean(all_bw_values)) if np.mean(all_bw_values) > 0 else 0,
+                'overall_mean_GB/s': mean_bw,
+                'overall_std_GB/s': std_bw,
+                'coefficient_of_variation': std_bw / mean_bw if mean_bw > 0 else 0.0,
             }
 
             # Detect slow performance
-            threshold = np.mean(all_bw_values) - 2 * np.std(all_bw_values)
-            slow_samples = sum(1 for bw in all_bw_values if bw < threshold)
+            threshold = mean_bw - 2 * std_bw
+            slow_samples = int(np.count_nonzero(all_bw_values < threshold))
 
             if slow_samples > 0:
                 analysis['slow_nodes'].append({
                     'detection': f'{slow_samples} samples below threshold',
                     'threshold_GB/s': float(threshold),
-                    'percentage': float(slow_samples / len(all_bw_values) * 100)
+                    'percentage': float(slow_samples / all_bw_values.size * 100)
                 })
 
         return analysis
 
+    def merge_raw_analyses(self, analyses: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Merge per-file analyze_from_raw_logs results into one analysis"""
+        merged = {
+            'timestamp': datetime.now().isoformat(),
+            'files': analyses,
+            'slow_nodes': [],
+            'summary': {}
+        }
+
+        for path, analysis in analyses.items():
+            for node in analysis['slow_nodes']:
+                # Per-rank/per-node logs: the file is the best identity we have
+                merged['slow_nodes'].append({'hostname': os.path.basename(path), 'source_file': path, **node})
+
+        merged['summary'] = {
+            'files_analyzed': len(analyses),
+            'files_without_data': sum(1 for a in analyses.values() if 'error' in a),
+            'files_with_slow_samples': sum(1 for a in analyses.values() if a['slow_nodes']),
+        }
+
+        return merged
+
     def generate_report(self, analysis: Dict[str, Any], output_file: str = None):
         """Generate human-readable report"""
-        report = []
-        report.append("=" * 70)
-        report.append("SLOW NODE DETECTION REPORT")
-        report.append("=" * 70)
-        report.append(f"Timestamp: {analysis.get('timestamp', 'N/A')}")
-        report.append("")
+        rule = "=" * 70
+        buf = io.StringIO()
+        w = buf.write
+
+        w(f"{rule}\nSLOW NODE DETECTION REPORT\n{rule}\n")
+        w(f"Timestamp: {analysis.get('timestamp', 'N/A')}\n\n")
 
         # Statistics
         if 'statistics' in analysis:
-            report.append("Overall Statistics:")
-            stats = analysis['statistics']
-            for key, value in stats.items():
-                report.append(f"  {key}: {value:.2f}")
-            report.append("")
+            w("Overall Statistics:\n")
+            for key, value in analysis['statistics'].items():
+                w(f"  {key}: {value:.2f}\n")
+            w("\n")
 
         if 'summary' in analysis:
-            report.append("Performance Summary:")
+            w("Performance Summary:\n")
             for key, value in analysis['summary'].items():
-                report.append(f"  {key}: {value:.4f}")
-            report.append("")
+                # Only the merged multi-file summary holds counts (Python ints)
+                w(f"  {key}: {value}\n" if isinstance(value, int) else f"  {key}: {value:.4f}\n")
+            w("\n")
 
         # Slow nodes
-        report.append("Slow Nodes Detected:")
+        w("Slow Nodes Detected:\n")
         if analysis['slow_nodes']:
             for i, node in enumerate(analysis['slow_nodes'], 1):
-                report.append(f"\n{i}. {node.get('hostname', 'Unknown')}")
-                report.append(f"   Reason: {node.get('reason', 'N/A')}")
-                report.append(f"   Confidence: {node.get('confidence', 'N/A')}")
+                w(f"\n{i}. {node.get('hostname', 'Unknown')}\n"
+                  f"   Reason: {node.get('reason', 'N/A')}\n"
+                  f"   Confidence: {node.get('confidence', 'N/A')}\n")
                 if 'detection' in node:
-                    report.append(f"   Detection: {node['detection']}")
+                    w(f"   Detection: {node['detection']}\n")
                 if 'threshold_GB/s' in node:
-                    report.append(f"   Threshold: {node['threshold_GB/s']:.2f} GB/s")
+                    w(f"   Threshold: {node['threshold_GB/s']:.2f} GB/s\n")
                 if 'percentage' in node:
-                    report.append(f"   Percentage: {node['percentage']:.1f}%")
+                    w(f"   Percentage: {node['percentage']:.1f}%\n")
         else:
-            report.append("  No slow nodes detected!")
+            w("  No slow nodes detected!\n")
 
-        report.append("")
-        report.append("=" * 70)
+        w(f"\n{rule}")
 
-        report_text = "\n".join(report)
+        report_text = buf.getvalue()
 
         # Print to console
         print(report_text)
@@ -320,6 +447,21 @@ class SlowNodeDetector:
         return report_text
 
 
+def _analyze_raw_file(log_file: str, verbose: bool = False) -> Dict[str, Any]:
+    """Worker entry point: analyze one raw log in its own process"""
+    return SlowNodeDetector(verbose=verbose).analyze_from_raw_logs(log_file)
+
+
+def _expand_inputs(path: str) -> List[str]:
+    """Resolve an input argument that may be a file, a directory or a glob"""
+    if os.path.isdir(path):
+        return sorted(f for f in glob.glob(os.path.join(path, '*')) if os.path.isfile(f))
+    if os.path.exists(path):
+        # Literal names win, even when they contain glob characters like [...]
+        return [path]
+    return sorted(glob.glob(path))
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Detect slow nodes from NCCL test results",
@@ -332,12 +474,15 @@ Examples:
   # Analyze raw log file
   %(prog)s --raw nccl_test.log
 
+  # Analyze one raw log per rank in parallel (directory or quoted glob)
+  %(prog)s --raw 'logs/nccl_rank*.log'
+
   # Generate detailed report
   %(prog)s results.json --output report.txt --verbose
         """
     )
 
-    parser.add_argument("input", help="Input file (JSON or raw log)")
+    parser.add_argument("input", help="Input file (JSON or raw log); with --raw also a directory or glob")
     parser.add_argument("--output", "-o", help="Output report file")
     parser.add_argument("--raw", action="store_true", help="Parse raw NCCL log format")
     parser.add_argument("--verbose", "-v", action="store_true", help="Verbose output")
@@ -346,22 +491,32 @@ Examples:
 
     args = parser.parse_args()
 
-    if not os.path.exists(args.input):
+    inputs = _expand_inputs(args.input)
+    if not inputs:
         print(f"Error: Input file not found: {args.input}")
         sys.exit(1)
+    if not args.raw and (len(inputs) > 1 or os.path.isdir(args.input)):
+        print(f"Error: {args.input} matches {len(inputs)} files; "
+              f"only --raw accepts several inputs")
+        sys.exit(1)
 
     detector = SlowNodeDetector(verbose=args.verbose)
 
     try:
-        if args.raw:
-            analysis = detector.analyze_from_raw_logs(args.input)
+        if args.raw and (len(inputs) > 1 or os.path.isdir(args.input)):
+            # Independent regex-parse workloads: one process per file
+            analyze = functools.partial(_analyze_raw_file, verbose=args.verbose)
+            with ProcessPoolExecutor(max_workers=min(len(inputs), os.cpu_count() or 1)) as executor:
+                analysis = detector.merge_raw_analyses(dict(zip(inputs, executor.map(analyze, inputs))))
+        elif args.raw:
+            analysis = detector.analyze_from_raw_logs(inputs[0])
         else:
-            test_results = detector.load_nccl_results(args.input)
+            test_results = detector.load_nccl_results(inputs[0])
             analysis = detector.analyze_node_performance(test_results)
 
         # Output results
         if args.json:
-            print(json.dumps(analysis, indent=2))
+            print(_dumps(analysis, indent=True).decode())
         else:
             detector.generate_report(analysis, args.output)
 
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Persistent NCCL Probe Worker
+
+Runs under a single mpirun across all hosts and keeps one NCCL process group
+alive for the whole detection run. Rank 0 reads subset requests from stdin as
+JSON lines, e.g. {"op": "test", "nodes": [0, 3]} (node indices into the
+hostfile), and answers each with one "PROBE_RESULT {...}" line on stdout.
+
+Each subset gets a torch.distributed sub-group, so bisection can test hundreds
+of node combinations while paying the mpirun + NCCL bootstrap cost only once.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+from typing import List
+
+import torch
+import torch.distributed as dist
+
+RESULT_PREFIX = "PROBE_RESULT "
+
+# Sub-group communicators kept alive for repeated subsets (bisection revisits
+# halves); pairwise mode probes O(N^2) distinct pairs, so older ones are freed
+GROUP_CACHE_SIZE = 4
+
+
+def _env_int(*names: str, default: int = 0) -> int:
+    """Read the first rank variable set by the MPI launcher"""
+    for name in names:
+        if name in os.environ:
+            return int(os.environ[name])
+    return default
+
+
+def _node_ranks(node_indices: List[int], gpus_per_node: int) -> List[int]:
+    """Map hostfile node indices to global ranks (mpirun --map-by slot)"""
+    return [node * gpus_per_node + gpu for node in node_indices for gpu in range(gpus_per_node)]
+
+
+def _time_allreduce(tensor: torch.Tensor, group, iters: int, warmup: int) -> float:
+    """Time all_reduce on a sub-group, returns seconds per iteration"""
+    for _ in range(warmup):
+        dist.all_reduce(tensor, group=group)
+    torch.cuda.synchronize()
+
+    start = time.perf_counter()
+    for _ in range(iters):
+        dist.all_reduce(tensor, group=group)
+    torch.cuda.synchronize()
+
+    return (time.perf_counter() - start) / iters
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Persistent NCCL probe worker (run under mpirun)")
+    parser.add_argument("--master-addr", required=True, help="Address of rank 0")
+    parser.add_argument("--master-port", type=int, default=29500, help="Rendezvous port")
+    parser.add_argument("--gpus-per-node", type=int, default=8, help="Number of GPUs per node")
+    parser.add_argument("--size", type=int, default=1 << 30, help="all_reduce size in bytes")
+    parser.add_argument("--iters", type=int, default=10, help="Timed iterations per probe")
+    parser.add_argument("--warmup", type=int, default=2, help="Warmup iterations per probe")
+
+    args = parser.parse_args()
+
+    rank = _env_int("OMPI_COMM_WORLD_RANK", "PMI_RANK", "RANK")
+    world_size = _env_int("OMPI_COMM_WORLD_SIZE", "PMI_SIZE", "WORLD_SIZE", default=1)
+    local_rank = _env_int("OMPI_COMM_WORLD_LOCAL_RANK", "LOCAL_RANK")
+
+    torch.cuda.set_device(local_rank)
+    dist.init_process_group(
+        "nccl",
+        init_method=f"tcp://{args.master_addr}:{args.master_port}",
+        rank=rank,
+        world_size=world_size
+    )
+    # Requests and timings travel over gloo so they never touch the GPUs under test
+    control = dist.new_group(backend="gloo")
+
+    tensor = torch.empty(args.size // 4, dtype=torch.float32, device="cuda")
+    size_bytes = tensor.numel() * tensor.element_size()
+    groups = OrderedDict()
+
+    while True:
+        request = [None]
+        if rank == 0:
+            line = sys.stdin.readline()
+            request[0] = json.loads(line) if line.strip() else {"op": "exit"}
+        dist.broadcast_object_list(request, src=0, group=control)
+        request = request[0]
+
+        if request.get("op") != "test":
+            break
+
+        ranks = _node_ranks(request["nodes"], args.gpus_per_node)
+        key = tuple(ranks)
+        if key in groups:
+            groups.move_to_end(key)
+        else:
+            # new_group is collective: every rank must call it, member or not.
+            # All ranks see the same requests, so their caches evict in lockstep
+            if len(groups) >= GROUP_CACHE_SIZE:
+                _, oldest = groups.popitem(last=False)
+                dist.destroy_process_group(oldest)  # No-op on non-members
+            groups[key] = dist.new_group(ranks=ranks)
+
+        elapsed = torch.zeros(1, dtype=torch.float64)
+        if rank in ranks:
+            elapsed[0] = _time_allreduce(tensor, groups[key], args.iters, args.warmup)
+        dist.all_reduce(elapsed, op=dist.ReduceOp.MAX, group=control)
+
+        if rank == 0:
+            n = len(ranks)
+            algbw = size_bytes / elapsed.item() / 1e9
+            busbw = algbw * 2 * (n - 1) / n  # Same definition as nccl-tests all_reduce
+            print(RESULT_PREFIX + json.dumps({
+                "nodes": request["nodes"],
+                "time_s": elapsed.item(),
+                "algbw_gb_s": algbw,
+                "busbw_gb_s": busbw,
+            }), flush=True)
+
+    dist.destroy_process_group()
+
+
+if __name__ == "__main__":
+    main()
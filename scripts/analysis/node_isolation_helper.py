@@ -11,9 +11,13 @@ import argparse
 import sys
 import os
 import shutil
+import tempfile
+import time
 from datetime import datetime
 from typing import List, Set
 
+from json_io import loads as _loads, dumps as _dumps
+
 
 class NodeIsolator:
     """Helper to isolate bad nodes from cluster configuration"""
@@ -30,40 +34,35 @@ class NodeIsolator:
 
         # Backup original
         if self.backup:
-            backup_file = f"{hostfile}.backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            backup_file = f"{hostfile}.backup_{time.strftime('%Y%m%d_%H%M%S')}"
             shutil.copy(hostfile, backup_file)
             print(f"Backup created: {backup_file}")
 
-        # Read and filter
-        good_lines = []
+        # Stream-filter into a temp file next to the output, then swap it in
+        # atomically so an interrupted run never leaves a truncated hostfile
+        output_file = output_file or hostfile
         excluded_count = 0
 
-        with open(hostfile, 'r') as f:
-            for line in f:
-                original_line = line
-                line = line.strip()
-
-                # Keep comments and empty lines
-                if not line or line.startswith('#'):
-                    good_lines.append(original_line)
-                    continue
-
-                # Extract hostname
-                hostname = line.split()[0]
-
-                # Check if this is a bad node
-                if hostname in self.bad_nodes:
-                    # Comment out this line
-                    good_lines.append(f"# ISOLATED: {original_line}")
-                    excluded_count += 1
-                    print(f"  Excluding: {hostname}")
-                else:
-                    good_lines.append(original_line)
-
-        # Write updated hostfile
-        output_file = output_file or hostfile
-        with open(output_file, 'w') as f:
-            f.writelines(good_lines)
+        with open(hostfile, 'r') as fin, tempfile.NamedTemporaryFile(
+                'w', dir=os.path.dirname(os.path.abspath(output_file)),
+                prefix=f".{os.path.basename(output_file)}.", delete=False) as fout:
+            try:
+                for line in fin:
+                    fields = line.split(None, 1)
+
+                    # Keep comments and empty lines; comment out bad nodes
+                    if fields and not fields[0].startswith('#') and fields[0] in self.bad_nodes:
+                        fout.write(f"# ISOLATED: {line}")
+                        excluded_count += 1
+                        print(f"  Excluding: {fields[0]}")
+                    else:
+                        fout.write(line)
+            except BaseException:
+                os.unlink(fout.name)
+                raise
+
+        shutil.copymode(hostfile, fout.name)
+        os.replace(fout.name, output_file)
 
         print(f"\nUpdated hostfile: {output_file}")
         print(f"Excluded {excluded_count} nodes")
@@ -115,16 +114,16 @@ class NodeIsolator:
             }
         }
 
-        with open(output_file, 'w') as f:
-            json.dump(report, f, indent=2)
+        with open(output_file, 'wb') as f:
+            f.write(_dumps(report, indent=True))
 
         print(f"\nIsolation report saved to: {output_file}")
 
 
 def load_bad_nodes_from_report(report_file: str) -> List[str]:
     """Load bad nodes from detection report"""
-    with open(report_file, 'r') as f:
-        data = json.load(f)
+    with open(report_file, 'rb') as f:
+        data = _loads(f.read())
 
     bad_nodes = set()
 
@@ -218,7 +217,7 @@ Examples:
         print(isolator.generate_slurm_exclude())
 
     # Generate isolation report
-    report_file = f"isolation_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    report_file = f"isolation_report_{time.strftime('%Y%m%d_%H%M%S')}.json"
     isolator.generate_report(report_file)
 
     print("\n✓ Isolation complete!")
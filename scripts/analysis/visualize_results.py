@@ -11,6 +11,8 @@ import os
 from typing import Dict, List, Any
 import numpy as np
 
+from detect_slow_nodes import _extract_busbw
+
 # Try to import visualization libraries
 try:
     import matplotlib
@@ -45,7 +47,7 @@ class NCCLVisualizer:
         for test in results.get('tests', []):
             if 'results' in test and test['results']:
                 sizes = [r['size_bytes'] for r in test['results']]
-                bandwidths = [r['busbw_GB/s'] for r in test['results']]
+                bandwidths = _extract_busbw(test)
 
                 ax.plot(sizes, bandwidths, marker='o', label=test['test_type'], linewidth=2)
 
@@ -138,7 +140,7 @@ class NCCLVisualizer:
         for test in results.get('tests', []):
             if 'results' in test and test['results']:
                 sizes = [r['size_bytes'] for r in test['results']]
-                bandwidths = [r['busbw_GB/s'] for r in test['results']]
+                bandwidths = _extract_busbw(test)
                 ax1.plot(sizes, bandwidths, marker='o', label=test['test_type'], linewidth=2)
 
         ax1.set_xlabel('Message Size (bytes)')
@@ -151,14 +153,14 @@ class NCCLVisualizer:
         # Plot 2: Statistics
         ax2 = fig.add_subplot(gs[1, 0])
         if 'tests' in results and results['tests']:
-            all_bw = []
-            for test in results['tests']:
-                if 'results' in test:
-                    all_bw.extend([r['busbw_GB/s'] for r in test['results']])
+            all_bw = np.concatenate(
+                [_extract_busbw(test) for test in results['tests'] if 'results' in test] or [np.empty(0)]
+            )
 
-            if all_bw:
+            if all_bw.size:
+                mean_bw = all_bw.mean()
                 ax2.hist(all_bw, bins=30, alpha=0.7, edgecolor='black')
-                ax2.axvline(np.mean(all_bw), color='r', linestyle='--', linewidth=2, label=f'Mean: {np.mean(all_bw):.2f}')
+                ax2.axvline(mean_bw, color='r', linestyle='--', linewidth=2, label=f'Mean: {mean_bw:.2f}')
                 ax2.set_xlabel('Bandwidth (GB/s)')
                 ax2.set_ylabel('Frequency')
                 ax2.set_title('Bandwidth Distribution', fontweight='bold')
@@ -173,9 +175,10 @@ class NCCLVisualizer:
         if 'tests' in results:
             for test in results['tests'][:5]:  # Limit to 5 tests
                 if 'results' in test and test['results']:
-                    max_bw = max(r['busbw_GB/s'] for r in test['results'])
-                    min_bw = min(r['busbw_GB/s'] for r in test['results'])
-                    avg_bw = np.mean([r['busbw_GB/s'] for r in test['results']])
+                    bw = _extract_busbw(test)
+                    max_bw = bw.max()
+                    min_bw = bw.min()
+                    avg_bw = bw.mean()
                     stats_data.append([test['test_type'], f'{min_bw:.2f}', f'{avg_bw:.2f}', f'{max_bw:.2f}'])
 
         if stats_data:
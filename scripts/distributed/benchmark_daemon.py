@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+NCCL Benchmark Daemon
+
+Runs under a single mpirun across all hosts, initializes one NCCL communicator
+and measures every requested collective over a message size sweep, the same
+sweep nccl-tests runs (-b/-e/-f). Rank 0 prints one "BENCH_RESULT {...}" line
+per collective and size, so the communicator setup is paid once per campaign
+instead of once per test binary.
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import List, Tuple
+
+import torch
+import torch.distributed as dist
+
+RESULT_PREFIX = "BENCH_RESULT "
+
+# busbw = algbw * factor(n), as defined by nccl-tests
+BUS_FACTORS = {
+    "all_reduce_perf": lambda n: 2 * (n - 1) / n,
+    "all_gather_perf": lambda n: (n - 1) / n,
+    "reduce_scatter_perf": lambda n: (n - 1) / n,
+    "broadcast_perf": lambda n: 1.0,
+}
+
+_UNITS = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+
+
+def _parse_size(text: str) -> int:
+    """Parse an nccl-tests style size (8, 64K, 8G)"""
+    text = text.strip().upper()
+    if text[-1] in _UNITS:
+        return int(text[:-1]) * _UNITS[text[-1]]
+    return int(text)
+
+
+def _parse_test(spec: str) -> Tuple[str, int, int, int]:
+    """Parse NAME:MIN:MAX:FACTOR"""
+    name, min_bytes, max_bytes, factor = spec.split(':')
+    return name, _parse_size(min_bytes), _parse_size(max_bytes), int(factor)
+
+
+def _env_int(*names: str, default: int = 0) -> int:
+    """Read the first rank variable set by the MPI launcher"""
+    for name in names:
+        if name in os.environ:
+            return int(os.environ[name])
+    return default
+
+
+def _collective(name: str, size_bytes: int, world_size: int):
+    """Allocate buffers for one message size and return (op, element count)
+
+    Sizes follow nccl-tests: all_gather and reduce_scatter sizes are the
+    full (gathered / pre-scatter) buffer, split evenly across ranks, so only
+    their counts are rounded to a multiple of world_size.
+    """
+    count = max(size_bytes // 4, 1)
+    if name in ("all_gather_perf", "reduce_scatter_perf"):
+        count = max(count // world_size * world_size, world_size)
+
+    if name == "all_reduce_perf":
+        buf = torch.empty(count, dtype=torch.float32, device="cuda")
+        return lambda: dist.all_reduce(buf), count
+    if name == "broadcast_perf":
+        buf = torch.empty(count, dtype=torch.float32, device="cuda")
+        return lambda: dist.broadcast(buf, src=0), count
+    if name == "all_gather_perf":
+        out = torch.empty(count, dtype=torch.float32, device="cuda")
+        inp = torch.empty(count // world_size, dtype=torch.float32, device="cuda")
+        return lambda: dist.all_gather_into_tensor(out, inp), count
+    if name == "reduce_scatter_perf":
+        inp = torch.empty(count, dtype=torch.float32, device="cuda")
+        out = torch.empty(count // world_size, dtype=torch.float32, device="cuda")
+        return lambda: dist.reduce_scatter_tensor(out, inp), count
+    raise ValueError(f"Unsupported collective: {name}")
+
+
+def _time_op(op, iters: int, warmup: int) -> float:
+    """Time op with CUDA events, returns microseconds per iteration"""
+    for _ in range(warmup):
+        op()
+
+    start = torch.cuda.Event(enable_timing=True)
+    end = torch.cuda.Event(enable_timing=True)
+    start.record()
+    for _ in range(iters):
+        op()
+    end.record()
+    end.synchronize()
+
+    return start.elapsed_time(end) * 1000 / iters
+
+
+def _sizes(min_bytes: int, max_bytes: int, factor: int) -> List[int]:
+    """Message sizes of an nccl-tests -b/-e/-f sweep"""
+    sizes = []
+    size = min_bytes
+    while size <= max_bytes:
+        sizes.append(size)
+        size *= factor
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NCCL benchmark daemon (run under mpirun)")
+    parser.add_argument("--master-addr", required=True, help="Address of rank 0")
+    parser.add_argument("--master-port", type=int, default=29500, help="Rendezvous port")
+    parser.add_argument("--test", action="append", required=True,
+                        help="Collective sweep NAME:MIN:MAX:FACTOR, e.g. all_reduce_perf:8:8G:2")
+    parser.add_argument("--iters", type=int, default=100, help="Timed iterations per size")
+    parser.add_argument("--warmup", type=int, default=5, help="Warmup iterations per size")
+
+    args = parser.parse_args()
+
+    rank = _env_int("OMPI_COMM_WORLD_RANK", "PMI_RANK", "RANK")
+    world_size = _env_int("OMPI_COMM_WORLD_SIZE", "PMI_SIZE", "WORLD_SIZE", default=1)
+    local_rank = _env_int("OMPI_COMM_WORLD_LOCAL_RANK", "LOCAL_RANK")
+
+    torch.cuda.set_device(local_rank)
+    init_start = time.perf_counter()
+    dist.init_process_group(
+        "nccl",
+        init_method=f"tcp://{args.master_addr}:{args.master_port}",
+        rank=rank,
+        world_size=world_size
+    )
+    # The communicator is created lazily; a first collective forces it up
+    dist.barrier()
+    if rank == 0:
+        print(f"Communicator ready in {time.perf_counter() - init_start:.1f}s", flush=True)
+
+    elapsed = torch.zeros(1, dtype=torch.float64, device="cuda")
+    for name, min_bytes, max_bytes, factor in map(_parse_test, args.test):
+        bus_factor = BUS_FACTORS[name](world_size)
+        last_count = None
+        for size in _sizes(min_bytes, max_bytes, factor):
+            op, count = _collective(name, size, world_size)
+            if count == last_count:
+                # Rounded up to the same buffer as the previous size: one row per size
+                continue
+            last_count = count
+            # Report the slowest rank, like nccl-tests
+            elapsed[0] = _time_op(op, args.iters, args.warmup)
+            dist.all_reduce(elapsed, op=dist.ReduceOp.MAX)
+
+            if rank == 0:
+                time_us = elapsed.item()
+                size_bytes = count * 4
+                algbw = size_bytes / time_us / 1e3
+                print(RESULT_PREFIX + json.dumps({
+                    "test": name,
+                    "size_bytes": size_bytes,
+                    "count": count,
+                    "avg_time_us": time_us,
+                    "algbw_GB/s": algbw,
+                    "busbw_GB/s": algbw * bus_factor,
+                }), flush=True)
+            del op
+
+    dist.destroy_process_group()
+
+
+if __name__ == "__main__":
+    main()
@@ -7,19 +7,276 @@ Provides a Python wrapper for running NCCL tests with detailed logging and analy
 import subprocess
 import json
 import argparse
+import glob
+import importlib.util
+import io
+import mmap
 import os
+import re
+import select
+import signal
 import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import List, Dict, Any
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+
+# nccl-tests data row: size count type redop [root] then out-of-place and
+# in-place (time algbw busbw #wrong) column groups
+_PERF_ROW_RE = re.compile(
+    rb'^[ \t]*(\d+)[ \t]+(\d+)[ \t]+\w+[ \t]+\w+[ \t]+(?:-?\d+[ \t]+)?'
+    rb'([\d.]+)[ \t]+([\d.]+)[ \t]+([\d.]+)[ \t]+\S+[ \t]+'
+    rb'([\d.]+)[ \t]+([\d.]+)[ \t]+([\d.]+)',
+    re.MULTILINE
+)
+
+# NCCL_DEBUG=INFO topology/graph lines that every rank repeats verbatim;
+# group 1 is the message without the host:pid:tid [dev] prefix
+_TOPO_LINE_RE = re.compile(
+    rb'^\S+:\d+:\d+ \[\d+\] NCCL INFO ((?:Topology|Channel|Trees|Rings|Setting|comm).*)$'
+)
+
+# benchmark_daemon.py sits next to this script; the path must exist on every host
+DAEMON_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_daemon.py")
+DAEMON_RESULT_PREFIX = b"BENCH_RESULT "
+
+# Columns of the .npy measurements file, in _PERF_ROW_RE group order
+_MEASUREMENT_DTYPE = [
+    ('size_bytes', 'i8'), ('count', 'i8'),
+    ('time_us', 'f8'), ('algbw', 'f8'), ('busbw', 'f8'),
+    ('time_us_inplace', 'f8'), ('algbw_inplace', 'f8'), ('busbw_inplace', 'f8'),
+]
+
+
+def _loads(data: bytes) -> Any:
+    """Parse JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dumps(obj: Any, indent: bool = False) -> bytes:
+    """Serialize to JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, option=option)
+    return json.dumps(obj, indent=2 if indent else None).encode()
+
+
+def _load_env_file(path: str) -> Dict[str, str]:
+    """Load a flat KEY: VALUE mapping of NCCL variables from a JSON or YAML file"""
+    with open(path, 'r') as f:
+        if path.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError(f"{path}: reading YAML needs PyYAML; install it or use a .json file")
+            env = yaml.safe_load(f)
+        else:
+            env = json.load(f)
+    if not isinstance(env, dict):
+        raise ValueError(f"{path}: expected a mapping of environment variables")
+    return {str(key): str(value) for key, value in env.items()}
+
+
+# sysfs PCI device directory name, e.g. 0000:07:00.0
+_PCI_BUSID_RE = re.compile(r'^[0-9a-f]{4}:[0-9a-f]{2}:[0-9a-f]{2}\.[0-7]$')
+
+
+def _pci_busid(busid: str) -> str:
+    """Normalize a PCI bus id to the sysfs form (nvidia-smi uses an 8-digit domain)"""
+    domain, _, rest = busid.strip().lower().partition(':')
+    return f"{int(domain, 16):04x}:{rest}"
+
+
+def _set_arg(args: List[str], flag: str, value: str) -> List[str]:
+    """Copy of an nccl-tests argument list with flag set to value"""
+    args = list(args)
+    if flag in args:
+        args[args.index(flag) + 1] = value
+    else:
+        args += [flag, value]
+    return args
+
+
+class _LogDeduper:
+    """Drop repeated NCCL topology lines from a byte stream
+
+    The first occurrence of each message is kept verbatim; repeats are counted
+    and written as "[Nx dedup] <message>" lines every SUMMARY_LINES input lines.
+    """
+
+    SUMMARY_LINES = 1000
+
+    def __init__(self):
+        self.seen = set()
+        self.repeats = {}
+        self.pending = b''
+        self.lines = 0
+
+    def feed(self, chunk: bytes) -> bytes:
+        """Filter the complete lines of chunk; a trailing partial line is held back"""
+        lines = (self.pending + chunk).split(b'\n')
+        self.pending = lines.pop()
+        out = []
+        for line in lines:
+            match = _TOPO_LINE_RE.match(line)
+            if match:
+                message = match.group(1)
+                if message in self.seen:
+                    self.repeats[message] = self.repeats.get(message, 0) + 1
+                else:
+                    self.seen.add(message)
+                    out.append(line)
+            else:
+                out.append(line)
+
+            self.lines += 1
+            if self.lines % self.SUMMARY_LINES == 0:
+                out.extend(self._summary())
+        return b''.join(line + b'\n' for line in out)
+
+    def flush(self) -> bytes:
+        """Return the held-back partial line and the outstanding repeat counts"""
+        out = [self.pending] if self.pending else []
+        self.pending = b''
+        out.extend(self._summary())
+        return b''.join(line + b'\n' for line in out)
+
+    def _summary(self) -> List[bytes]:
+        summary = [b'[%dx dedup] %s' % (count, message) for message, count in self.repeats.items()]
+        self.repeats.clear()
+        return summary
+
+
+def _stdout_fd() -> int:
+    """sys.stdout's file descriptor, or None when it is not backed by one (e.g. StringIO)"""
+    try:
+        return sys.stdout.fileno()
+    except (AttributeError, io.UnsupportedOperation):
+        return None
+
+
+def _tee(data: bytes, fds: List[int]):
+    """Write the same buffer to every fd, retrying short writes"""
+    for fd in fds:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+
 
 class NCCLTest:
     """NCCL bandwidth test runner"""
 
-    def __init__(self, hostfile: str, gpus_per_node: int = 8, output_dir: str = "./results"):
+    # Bytes per read from the mpirun output pipe
+    READ_SIZE = 64 * 1024
+
+    # Bytes per in-kernel splice from an output pipe to the log file
+    SPLICE_SIZE = 1 << 20
+
+    # While splicing, echo at most ECHO_TAIL new bytes every ECHO_INTERVAL seconds
+    ECHO_INTERVAL = 2.0
+    ECHO_TAIL = 4096
+
+    # Seconds to wait for a daemonized PRRTE DVM to report its URI
+    DVM_START_TIMEOUT = 60
+
+    # MCA parameters passed to every launch
+    _STATIC_MCA = (
+        "-mca", "pml", "ob1",
+        "-mca", "btl", "^openib",
+        "-mca", "btl_tcp_if_include", "eth0",
+    )
+
+    # Default NCCL environment; --env-file entries override or extend it
+    NCCL_ENV = {
+        "NCCL_DEBUG": "INFO",
+        "NCCL_IB_DISABLE": "0",
+        "NCCL_SOCKET_IFNAME": "eth0",
+        "NCCL_IB_HCA": "mlx5",
+        "NCCL_NET_GDR_LEVEL": "5",
+        "NCCL_IB_GID_INDEX": "3",
+        "NCCL_BOOTSTRAP_PARALLEL_ALLGATHER": "1",
+    }
+
+    # Tests run by each --profile (None = all). allreduce = reduce_scatter +
+    # allgather over the same rings/trees, so on a healthy fabric the skipped
+    # tests' busbw follows from the ones that are run
+    PROFILES = {
+        "full": None,
+        "fast": ("all_reduce_perf", "all_gather_perf"),
+        "allreduce-only": ("all_reduce_perf",),
+    }
+
+    # nccl-tests arguments per --sweep (None = each test's own full sweep).
+    # bw keeps the bandwidth-bound sizes; lat the latency-bound ones. Both
+    # skip the correctness check (-c 0)
+    SIZE_SWEEPS = {
+        "full": None,
+        "bw": ("-b", "1M", "-e", "8G", "-f", "4", "-g", "1", "-c", "0", "-n", "50"),
+        "lat": ("-b", "8", "-e", "4K", "-f", "2", "-g", "1", "-c", "0", "-n", "1000"),
+    }
+
+    # NCCL_MIN_NCHANNELS values tried by channel_sweep
+    CHANNEL_COUNTS = ("4", "8", "16", "24", "32")
+
+    # Seconds between SIGTERM and SIGKILL when a test times out
+    KILL_GRACE = 10
+
+    # Short untimed all_reduce run before the campaign
+    WARMUP_BINARY = "/usr/local/bin/all_reduce_perf"
+    WARMUP_ARGS = ("-b", "8", "-e", "1M", "-f", "2", "-g", "1", "-c", "0", "-n", "5")
+    WARMUP_TIMEOUT = 120
+
+    # Iterations of the -c 1 validation run made by check_once
+    CHECK_ITERS = 5
+
+    def __init__(self, hostfile: str, gpus_per_node: int = 8, output_dir: str = "./results",
+                 parallel_groups: int = 1, profile: str = "full", use_dvm: bool = False,
+                 tree_spawn: bool = True, algorithms: List[str] = None, protocols: List[str] = None,
+                 nccl_env: Dict[str, str] = None, auto_topo: bool = False, daemon: bool = False,
+                 numa_bind: bool = False, verbose: bool = False, size_sweep: str = "full",
+                 check_once: bool = True, channel_sweep: bool = False, dedup_log: bool = False,
+                 test_timeout: float = 3600, warmup: bool = True):
         self.hostfile = hostfile
         self.gpus_per_node = gpus_per_node
         self.output_dir = output_dir
+        self.parallel_groups = parallel_groups
+        self.profile = profile
+        self.size_sweep = size_sweep
+        self.check_once = check_once
+        self.dedup_log = dedup_log
+        self.test_timeout = test_timeout
+        self.warmup = warmup
+        self.use_dvm = use_dvm
+        self.tree_spawn = tree_spawn
+        self.algorithms = algorithms or []
+        self.protocols = protocols or []
+        self.channels = list(self.CHANNEL_COUNTS) if channel_sweep else []
+        self.daemon = daemon
+        self.numa_bind = numa_bind
+        self.verbose = verbose
+        self.nccl_env = {**self.NCCL_ENV, **(nccl_env or {})}
+        self._dvm_uri_file = None
         self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
         os.makedirs(output_dir, exist_ok=True)
@@ -29,82 +286,290 @@ class NCCLTest:
         self.node_count = len(self.hosts)
         self.total_procs = self.node_count * self.gpus_per_node
 
+        if auto_topo:
+            topo_file = self.write_topo_file()
+            if topo_file:
+                # An explicit NCCL_TOPO_FILE from --env-file wins
+                self.nccl_env.setdefault("NCCL_TOPO_FILE", topo_file)
+
+        # Launch options that are the same for every test, built once
+        self._static_args = (
+            *self._binding_args(),
+            *(("--report-bindings",) if verbose else ()),
+            *self._STATIC_MCA,
+            *(arg for key, value in self.nccl_env.items() for arg in ("-x", f"{key}={value}")),
+            "-x", "LD_LIBRARY_PATH",
+        )
+
     def _parse_hostfile(self) -> List[str]:
         """Parse MPI hostfile"""
-        hosts = []
         with open(self.hostfile, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#'):
-                    host = line.split()[0]
-                    hosts.append(host)
-        return hosts
-
-    def _build_mpi_command(self, test_binary: str, test_args: List[str]) -> List[str]:
-        """Build MPI command"""
+            data = f.read()
+        lines = (line.strip() for line in data.splitlines())
+        return [line.split(maxsplit=1)[0] for line in lines if line and not line.startswith('#')]
+
+    def _binding_args(self) -> List[str]:
+        """mpirun mapping/binding options that keep each rank on its GPU's NUMA node
+
+        ppr:K:numa fills NUMA nodes in local rank order (ranks 0..K-1 on node 0),
+        matching the usual GPU numbering, unlike round-robin --map-by numa.
+        PE reserves cores_per_rank physical cores per rank, which binds each rank
+        to cores of its own NUMA node. Counts come from the launch node, so this
+        is opt-in: it only fits when the launcher has the workers' CPU layout
+        (not e.g. a small mpi-operator launcher pod).
+        """
+        if not self.numa_bind:
+            return ["--bind-to", "none", "--map-by", "slot"]
+
+        numa_nodes = len(glob.glob("/sys/devices/system/node/node[0-9]*")) or 1
+        ranks_per_numa = -(-self.gpus_per_node // numa_nodes)
+
+        cpus = len(os.sched_getaffinity(0))
+        try:
+            with open("/sys/devices/system/cpu/smt/active") as f:
+                if f.read().strip() == "1":
+                    cpus //= 2  # PE counts cores, not hardware threads
+        except OSError:
+            pass
+        cores_per_rank = max(1, cpus // self.gpus_per_node)
+
+        return ["--map-by", f"ppr:{ranks_per_numa}:numa:PE={cores_per_rank}", "--bind-to", "core"]
+
+    def write_topo_file(self) -> str:
+        """Write an NCCL topology XML from this node's `nvidia-smi topo -mp` matrix
+
+        GPUs and NICs are grouped under their NUMA node's CPU and then under the
+        upstream port of the topmost PCIe switch below their root port, so devices
+        behind one switch (PIX/PXB) share a <pci> node. NICs are only included
+        when they share a switch with a GPU. Attributes NCCL can read from sysfs
+        are left out. The
+        launch node is assumed to have the same layout as the rest of the hosts.
+        """
+        try:
+            matrix = subprocess.run(["nvidia-smi", "topo", "-mp"], capture_output=True,
+                                    text=True, check=True).stdout
+            gpu_busids = subprocess.run(
+                ["nvidia-smi", "--query-gpu=index,pci.bus_id", "--format=csv,noheader"],
+                capture_output=True, text=True, check=True
+            ).stdout
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"Warning: could not read GPU topology ({e}), not setting NCCL_TOPO_FILE")
+            return None
+
+        busids = {}
+        for line in gpu_busids.splitlines():
+            if line.strip():
+                index, busid = line.split(',')
+                busids[f"GPU{index.strip()}"] = _pci_busid(busid)
+
+        devices = []
+        numa = {}
+        relations = {}
+        nic_names = {}
+        for line in matrix.splitlines():
+            tokens = line.split()
+            if not tokens:
+                continue
+            if not devices and re.match(r'(GPU|NIC)\d+$', tokens[0]):
+                devices = [t for t in tokens if re.match(r'(GPU|NIC)\d+$', t)]
+            elif devices and tokens[0] in devices and len(tokens) > len(devices):
+                relations[tokens[0]] = dict(zip(devices, tokens[1:1 + len(devices)]))
+                affinity = tokens[len(devices) + 2:len(devices) + 3]
+                if tokens[0].startswith("GPU") and affinity and affinity[0].isdigit():
+                    numa[tokens[0]] = affinity[0]
+            elif re.match(r'NIC\d+:$', tokens[0]) and len(tokens) > 1:
+                nic_names[tokens[0][:-1]] = tokens[1]
+
+        def bridge(busid: str) -> str:
+            device = f"/sys/bus/pci/devices/{busid}"
+            if not os.path.exists(device):
+                return None
+            # .../pci0000:00/<root port>/<switch upstream>/<downstream>/.../<device>
+            chain = [part for part in os.path.realpath(device).split('/') if _PCI_BUSID_RE.match(part)]
+            # The immediate parent is a per-device downstream port; the switch's
+            # upstream port sits right below the root port. No switch: None
+            return chain[1] if len(chain) >= 3 else None
+
+        # numa -> bridge (None = directly on the root complex) -> [xml lines]
+        tree = {}
+        placed = set()
+        for gpu in sorted(busids, key=lambda name: int(name[3:])):
+            node = tree.setdefault(numa.get(gpu, "0"), {})
+            node.setdefault(bridge(busids[gpu]), []).append(
+                f'<pci busid="{busids[gpu]}" class="0x030200"/>')
+            for nic, relation in relations.get(gpu, {}).items():
+                name = nic_names.get(nic)
+                if (name and nic not in placed and relation in ("PIX", "PXB")
+                        and os.path.exists(f"/sys/class/infiniband/{name}/device")):
+                    nic_busid = os.path.basename(os.path.realpath(f"/sys/class/infiniband/{name}/device"))
+                    node.setdefault(bridge(nic_busid), []).append(
+                        f'<pci busid="{nic_busid}" class="0x020700">'
+                        f'<nic><net name="{name}" dev="{int(nic[3:])}"/></nic></pci>')
+                    placed.add(nic)
+
+        lines = ['<system version="1">']
+        for numaid, switches in sorted(tree.items()):
+            lines.append(f'  <cpu numaid="{numaid}">')
+            for switch, children in switches.items():
+                if switch is None:
+                    lines.extend(f'    {child}' for child in children)
+                else:
+                    lines.append(f'    <pci busid="{switch}" class="0x060400">')
+                    lines.extend(f'      {child}' for child in children)
+                    lines.append('    </pci>')
+            lines.append('  </cpu>')
+        lines.append('</system>')
+
+        # NCCL_TOPO_FILE is read on every rank: output_dir must be a shared path
+        topo_file = os.path.abspath(os.path.join(self.output_dir, f"nccl_topo_{self.timestamp}.xml"))
+        with open(topo_file, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        print(f"NCCL topology written to {topo_file}")
+        return topo_file
+
+    def start_dvm(self) -> bool:
+        """Start a persistent PRRTE DVM so each test skips the SSH launch and wire-up"""
+        uri_file = os.path.join(self.output_dir, f".dvm_uri_{self.timestamp}")
+        try:
+            subprocess.run(
+                ["prte", "--daemonize", "--allow-run-as-root",
+                 "--hostfile", self.hostfile, "--report-uri", uri_file],
+                check=True
+            )
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"Warning: could not start PRRTE DVM ({e}), falling back to mpirun")
+            return False
+
+        # --daemonize returns before the URI is written
+        deadline = time.monotonic() + self.DVM_START_TIMEOUT
+        while not (os.path.exists(uri_file) and os.path.getsize(uri_file)):
+            if time.monotonic() > deadline:
+                print("Warning: PRRTE DVM did not report its URI, falling back to mpirun")
+                return False
+            time.sleep(0.1)
+
+        self._dvm_uri_file = uri_file
+        print(f"PRRTE DVM started ({uri_file})")
+        return True
+
+    def stop_dvm(self):
+        """Shut down the DVM started by start_dvm"""
+        if self._dvm_uri_file is None:
+            return
+        subprocess.run(["pterm", "--dvm-uri", f"file:{self._dvm_uri_file}"])
+        os.unlink(self._dvm_uri_file)
+        self._dvm_uri_file = None
+
+    def __enter__(self):
+        if self.use_dvm:
+            self.start_dvm()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop_dvm()
+
+    def _build_mpi_command(self, test_binary: str, test_args: List[str],
+                           hostfile: str = None, num_procs: int = None,
+                           env: List[str] = None) -> List[str]:
+        """Build MPI command (defaults to the full hostfile); env adds -x KEY=VALUE pairs"""
+        if self._dvm_uri_file:
+            # Submit to the running DVM; it already owns the daemons and routing
+            launcher = ["prun", "--dvm-uri", f"file:{self._dvm_uri_file}"]
+        else:
+            launcher = ["mpirun"]
+
         cmd = [
-            "mpirun",
+            *launcher,
             "--allow-run-as-root",
-            "--hostfile", self.hostfile,
-            "-np", str(self.total_procs),
-            "--bind-to", "none",
-            "--map-by", "slot",
-            "-mca", "pml", "ob1",
-            "-mca", "btl", "^openib",
-            "-mca", "btl_tcp_if_include", "eth0",
-            "--mca", "plm_rsh_no_tree_spawn", "1",
-            "-x", "NCCL_DEBUG=INFO",
-            "-x", "NCCL_IB_DISABLE=0",
-            "-x", "NCCL_SOCKET_IFNAME=eth0",
-            "-x", "NCCL_IB_HCA=mlx5",
-            "-x", "NCCL_NET_GDR_LEVEL=5",
-            "-x", "NCCL_IB_GID_INDEX=3",
-            "-x", "LD_LIBRARY_PATH",
-            test_binary,
+            "--hostfile", hostfile or self.hostfile,
+            "-np", str(num_procs or self.total_procs),
+            *self._static_args,
         ]
+        if not self.tree_spawn and not self._dvm_uri_file:
+            # Flat head-node SSH fan-out (O(N) launch); default tree spawn is
+            # O(log N). Launch-time only: a DVM has already spawned its daemons
+            cmd += ["--mca", "plm_rsh_no_tree_spawn", "1"]
+        for var in env or []:
+            cmd += ["-x", var]
+        cmd.append(test_binary)
         cmd.extend(test_args)
         return cmd
 
-    def run_test(self, test_name: str, test_binary: str, test_args: List[str]) -> Dict[str, Any]:
-        """Run a single NCCL test"""
+    def run_test(self, test_name: str, test_binary: str, test_args: List[str],
+                 hostfile: str = None, num_procs: int = None, echo: bool = True,
+                 env: List[str] = None) -> Dict[str, Any]:
+        """Run a single NCCL test (echo=False keeps its output in the log file only)"""
         print(f"\n{'='*60}")
         print(f"Running {test_name}...")
         print(f"{'='*60}\n")
 
         output_file = os.path.join(self.output_dir, f"{test_name}_{self.timestamp}.txt")
 
-        cmd = self._build_mpi_command(test_binary, test_args)
+        cmd = self._build_mpi_command(test_binary, test_args, hostfile, num_procs, env)
 
-        print(f"Command: {' '.join(cmd)}\n")
+        cmd_str = ' '.join(cmd)
+        print(f"Command: {cmd_str}\n")
 
         result = {
             "test_name": test_name,
-            "command": ' '.join(cmd),
+            "command": cmd_str,
             "timestamp": datetime.now().isoformat(),
             "success": False,
             "output_file": output_file,
         }
 
         try:
-            with open(output_file, 'w') as f:
+            with open(output_file, 'wb+', buffering=0) as f:
+                # Linux: move both pipes into the log in-kernel; elsewhere (or to
+                # filter the log) merge stderr into stdout and copy through Python
+                # Echoing the spliced tail needs a real stdout fd
+                splice = (hasattr(os, "splice") and not self.dedup_log
+                          and (not echo or _stdout_fd() is not None))
+                # Own session (setsid) so a timeout can kill the whole mpirun tree;
+                # start_new_session is the thread-safe form of preexec_fn=os.setsid
                 process = subprocess.Popen(
                     cmd,
                     stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    text=True,
-                    bufsize=1
+                    stderr=subprocess.PIPE if splice else subprocess.STDOUT,
+                    bufsize=0,
+                    start_new_session=True
                 )
 
-                # Stream output
-                for line in process.stdout:
-                    print(line, end='')
-                    f.write(line)
+                # A hung NCCL keeps the pipes open, so the deadline is enforced
+                # from a timer thread while output is still being captured
+                expired = threading.Event()
+                timer = None
+                if self.test_timeout:
+                    timer = threading.Timer(self.test_timeout, self._terminate, (process, expired))
+                    timer.start()
 
-                process.wait()
+                try:
+                    sys.stdout.flush()
+                    if splice:
+                        self._splice_output(process, f.fileno(), echo)
+                        # Spliced bytes never reached Python: scan the log in place
+                        rows = self._parse_log(f.fileno())
+                    else:
+                        rows = self._copy_output(process, f.fileno(), echo)
+                    process.wait()
+                finally:
+                    if timer:
+                        timer.cancel()
+                    if process.poll() is None:
+                        # Interrupted: do not leave mpirun running in its own session
+                        self._terminate(process)
+
+                if expired.is_set():
+                    result["timeout"] = True
+                    result["error"] = f"Test timeout after {self.test_timeout}s"
+                    print(f"\n✗ {test_name} timed out after {self.test_timeout}s, killed")
 
                 result["success"] = process.returncode == 0
                 result["return_code"] = process.returncode
 
+                if rows:
+                    self._store_measurements(result, rows, output_file)
+
                 if result["success"]:
                     print(f"\n✓ {test_name} completed successfully")
                 else:
@@ -116,6 +581,313 @@ class NCCLTest:
 
         return result
 
+    def _terminate(self, process: subprocess.Popen, expired: threading.Event = None):
+        """SIGTERM the test's process group, then SIGKILL it after KILL_GRACE seconds"""
+        if expired is not None:
+            expired.set()
+        try:
+            # start_new_session made mpirun a group leader: pgid == pid
+            os.killpg(process.pid, signal.SIGTERM)
+            try:
+                process.wait(timeout=self.KILL_GRACE)
+            except subprocess.TimeoutExpired:
+                os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    def _splice_output(self, process: subprocess.Popen, out_fd: int, echo: bool):
+        """Splice stdout and stderr into out_fd until both close, echoing a periodic tail"""
+        poller = select.poll()
+        pipes = {pipe.fileno(): pipe for pipe in (process.stdout, process.stderr)}
+        for fd in pipes:
+            poller.register(fd, select.POLLIN)
+
+        echoed = 0
+        next_echo = time.monotonic() + self.ECHO_INTERVAL
+        while pipes:
+            # One thread splices both pipes, so writes never race on the file offset
+            for fd, _ in poller.poll(self.ECHO_INTERVAL * 1000):
+                if not os.splice(fd, out_fd, self.SPLICE_SIZE,
+                                 flags=os.SPLICE_F_MOVE | os.SPLICE_F_MORE):
+                    poller.unregister(fd)
+                    pipes.pop(fd).close()
+            if echo and time.monotonic() >= next_echo:
+                echoed = self._echo_tail(out_fd, echoed)
+                next_echo = time.monotonic() + self.ECHO_INTERVAL
+        if echo:
+            self._echo_tail(out_fd, echoed)
+
+    def _echo_tail(self, fd: int, start: int) -> int:
+        """Print the last ECHO_TAIL bytes written to fd after offset start; returns the new end"""
+        end = os.fstat(fd).st_size
+        if end > start:
+            length = min(end - start, self.ECHO_TAIL)
+            tail = os.pread(fd, length, end - length)
+            if length < end - start:
+                # Skipped output: start the tail on a line boundary
+                tail = tail[tail.find(b'\n') + 1:]
+            _tee(tail, [sys.stdout.fileno()])
+        return end
+
+    def _copy_output(self, process: subprocess.Popen, out_fd: int, echo: bool) -> List[tuple]:
+        """Copy the merged output pipe to out_fd (and stdout) block by block
+
+        Returns the perf rows, parsed from each block's complete lines as they
+        arrive so the log is never read back.
+        """
+        stdout_fd = _stdout_fd() if echo else None
+        fds = [out_fd] if stdout_fd is None else [out_fd, stdout_fd]
+        # Redirected stdout without a descriptor: echo through its text interface
+        echo_text = echo and stdout_fd is None
+        deduper = _LogDeduper() if self.dedup_log else None
+        fd = process.stdout.fileno()
+        rows = []
+        pending = b''
+        while True:
+            chunk = os.read(fd, self.READ_SIZE)
+            if not chunk:
+                break
+            data = deduper.feed(chunk) if deduper else chunk
+            _tee(data, fds)
+            if echo_text:
+                sys.stdout.write(data.decode(errors="replace"))
+
+            # Keep the partial last line for the next block
+            pending += chunk
+            cut = pending.rfind(b'\n') + 1
+            if cut:
+                rows.extend(_PERF_ROW_RE.findall(pending, 0, cut))
+                pending = pending[cut:]
+        rows.extend(_PERF_ROW_RE.findall(pending))
+        if deduper:
+            data = deduper.flush()
+            _tee(data, fds)
+            if echo_text:
+                sys.stdout.write(data.decode(errors="replace"))
+        process.stdout.close()
+        return rows
+
+    def _parse_log(self, fd: int) -> List[tuple]:
+        """Find perf rows in a finished log through mmap (no copy into memory)"""
+        if not os.fstat(fd).st_size:
+            return []
+        with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+            return _PERF_ROW_RE.findall(mm)
+
+    def _store_measurements(self, result: Dict[str, Any], rows: List[tuple], output_file: str):
+        """Attach parsed rows to the result (detect_slow_nodes format) and save them as .npy"""
+        result["test_type"] = result["test_name"]
+        result["results"] = [
+            {
+                "size_bytes": int(row[0]),
+                "count": int(row[1]),
+                "avg_time_us": float(row[2]),
+                "algbw_GB/s": float(row[3]),
+                "busbw_GB/s": float(row[4]),
+            }
+            for row in rows
+        ]
+
+        if np is not None:
+            measurements_file = os.path.splitext(output_file)[0] + ".npy"
+            np.save(measurements_file, np.array(rows, dtype=_MEASUREMENT_DTYPE))
+            result["measurements_file"] = measurements_file
+
+    def _sweep(self, tests: List[Dict[str, Any]], env_var: str, values: List[str],
+               tag: str) -> List[Dict[str, Any]]:
+        """Replace each test with one variant per value of an NCCL environment variable"""
+        if not values:
+            return tests
+        return [
+            {
+                **test,
+                "name": f"{test['name']}_{value}",
+                "env": [*test.get("env", []), f"{env_var}={value}"],
+                "tags": {**test.get("tags", {}), tag: value},
+                "base_test": test.get("base_test", test["name"]),
+            }
+            for test in tests for value in values
+        ]
+
+    def _run_entry(self, test: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        """Run one entry of the test list and label the result with its sweep tags"""
+        args = test["args"]
+        check = None
+        if self.check_once and "-c" in args and args[args.index("-c") + 1] == "1":
+            # Validate with a short checked run, then measure without the
+            # per-iteration correctness pass
+            check = self.run_test(f"{test['name']}_check", test["binary"],
+                                  _set_arg(args, "-n", str(self.CHECK_ITERS)),
+                                  env=test.get("env"), **kwargs)
+            args = _set_arg(args, "-c", "0")
+
+        if check is not None and not check["success"]:
+            result = {key: check[key] for key in
+                      ("command", "timestamp", "success", "output_file", "return_code", "error")
+                      if key in check}
+            result["test_name"] = test["name"]
+            print(f"Skipping {test['name']} measurement: correctness check failed")
+        else:
+            result = self.run_test(test["name"], test["binary"], args, env=test.get("env"), **kwargs)
+
+        if check is not None:
+            result["check"] = {"success": check["success"], "output_file": check["output_file"]}
+        if "tags" in test:
+            result["base_test"] = test["base_test"]
+            result.update(test["tags"])
+        return result
+
+    def _best_by_size(self, results: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Fastest sweep variant (highest busbw) at each message size, per base test"""
+        best = {}
+        for result in results:
+            if "base_test" not in result:
+                continue
+            per_size = best.setdefault(result["base_test"], {})
+            tags = {key: result[key] for key in ("algorithm", "protocol", "channels") if key in result}
+            for row in result.get("results", []):
+                current = per_size.get(str(row["size_bytes"]))
+                if current is None or row["busbw_GB/s"] > current["busbw_GB/s"]:
+                    per_size[str(row["size_bytes"])] = {
+                        "test_name": result["test_name"], **tags, "busbw_GB/s": row["busbw_GB/s"]
+                    }
+        return best
+
+    def _warmup(self) -> bool:
+        """Run a tiny all_reduce on all hosts and discard its output
+
+        Absorbs first-launch costs outside the measurements: cold binary and
+        library pages, SSH/ARP setup, GPUs and NICs leaving idle power states.
+        """
+        print("Warmup run (output discarded)...")
+        cmd = self._build_mpi_command(self.WARMUP_BINARY, list(self.WARMUP_ARGS))
+        try:
+            # Own session, like run_test, so a hang can kill the whole mpirun tree
+            process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                       start_new_session=True)
+        except OSError as e:
+            print(f"Warning: warmup run failed ({e})")
+            return False
+
+        try:
+            process.wait(timeout=self.WARMUP_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            self._terminate(process)
+            print(f"Warning: warmup run timed out after {self.WARMUP_TIMEOUT}s, killed")
+            return False
+        finally:
+            if process.poll() is None:
+                self._terminate(process)
+
+        if process.returncode != 0:
+            print(f"Warning: warmup run failed with return code {process.returncode}")
+            return False
+        return True
+
+    def _run_daemon(self, tests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Measure all tests in one mpirun through benchmark_daemon.py (one NCCL init)"""
+        daemon_args = [DAEMON_SCRIPT, "--master-addr", self.hosts[0]]
+        for test in tests:
+            args = test["args"]
+            sweep = [args[args.index(flag) + 1] for flag in ("-b", "-e", "-f")]
+            daemon_args += ["--test", ":".join([test["name"], *sweep])]
+        args = tests[0]["args"]
+        if "-n" in args:
+            daemon_args += ["--iters", args[args.index("-n") + 1]]
+
+        run = self.run_test("benchmark_daemon", "python3", daemon_args)
+
+        rows = {test["name"]: [] for test in tests}
+        if os.path.exists(run["output_file"]):
+            with open(run["output_file"], 'rb') as f:
+                for line in f:
+                    if line.startswith(DAEMON_RESULT_PREFIX):
+                        row = _loads(line[len(DAEMON_RESULT_PREFIX):])
+                        rows[row.pop("test")].append(row)
+
+        return [
+            {
+                "test_name": test["name"],
+                "test_type": test["name"],
+                "command": run["command"],
+                "timestamp": run["timestamp"],
+                "success": run["success"] and bool(rows[test["name"]]),
+                "output_file": run["output_file"],
+                "return_code": run.get("return_code"),
+                "daemon": True,
+                "results": rows[test["name"]],
+            }
+            for test in tests
+        ]
+
+    def _write_summary_parquet(self, tests: List[Dict[str, Any]]) -> str:
+        """
+        Write one row per (test, message size) as a columnar Parquet file
+        Returns its path, or None when pyarrow is not installed
+        """
+        if pa is None:
+            return None
+
+        rows = [(test, row) for test in tests for row in test.get("results", [])]
+        table = pa.table({
+            "test_name": [test["test_name"] for test, _ in rows],
+            "base_test": [test.get("base_test", test["test_name"]) for test, _ in rows],
+            "algorithm": pa.array([test.get("algorithm") for test, _ in rows], type=pa.string()),
+            "protocol": pa.array([test.get("protocol") for test, _ in rows], type=pa.string()),
+            "channels": pa.array([test.get("channels") for test, _ in rows], type=pa.string()),
+            "timestamp": [test["timestamp"] for test, _ in rows],
+            "size_bytes": pa.array([row["size_bytes"] for _, row in rows], type=pa.int64()),
+            "count": pa.array([row["count"] for _, row in rows], type=pa.int64()),
+            "avg_time_us": pa.array([row["avg_time_us"] for _, row in rows], type=pa.float64()),
+            "algbw_gb_s": pa.array([row["algbw_GB/s"] for _, row in rows], type=pa.float64()),
+            "busbw_gb_s": pa.array([row["busbw_GB/s"] for _, row in rows], type=pa.float64()),
+        })
+
+        path = os.path.join(self.output_dir, f"summary_{self.timestamp}.parquet")
+        pq.write_table(table, path, compression="zstd")
+        return path
+
+    def _run_group(self, hosts: List[str], tests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Run tests one after another on a host subset through a temporary hostfile"""
+        with tempfile.NamedTemporaryFile('w', dir=self.output_dir, prefix=".hostfile_",
+                                         delete=False) as f:
+            f.writelines(f"{host} slots={self.gpus_per_node}\n" for host in hosts)
+
+        try:
+            results = []
+            for test in tests:
+                result = self._run_entry(test, hostfile=f.name,
+                                         num_procs=len(hosts) * self.gpus_per_node, echo=False)
+                result["hosts"] = hosts
+                results.append(result)
+            return results
+        finally:
+            os.unlink(f.name)
+
+    def _run_parallel(self, tests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Run tests concurrently, each group of tests on its own disjoint host subset"""
+        groups = min(self.parallel_groups, len(tests), self.node_count)
+
+        # Contiguous host chunks keep each group on neighbouring (same rack) nodes
+        size, extra = divmod(self.node_count, groups)
+        host_groups = []
+        start = 0
+        for g in range(groups):
+            end = start + size + (1 if g < extra else 0)
+            host_groups.append(self.hosts[start:end])
+            start = end
+
+        print(f"Running {len(tests)} tests in {groups} parallel groups: "
+              f"{', '.join(str(len(h)) for h in host_groups)} nodes")
+
+        with ThreadPoolExecutor(max_workers=groups) as executor:
+            futures = [executor.submit(self._run_group, host_groups[g], tests[g::groups])
+                       for g in range(groups)]
+            by_name = {r["test_name"]: r for future in futures for r in future.result()}
+
+        # Preserve the order of the test list
+        return [by_name[test["name"]] for test in tests]
+
     def run_all_tests(self) -> Dict[str, Any]:
         """Run all NCCL tests"""
         print(f"\nNCCL Distributed Bandwidth Test")
@@ -123,6 +895,8 @@ class NCCLTest:
         print(f"Nodes: {self.node_count}")
         print(f"GPUs per node: {self.gpus_per_node}")
         print(f"Total processes: {self.total_procs}")
+        print(f"Profile: {self.profile}")
+        print(f"Size sweep: {self.size_sweep}")
         print(f"Output directory: {self.output_dir}\n")
 
         tests = [
@@ -148,6 +922,21 @@ class NCCLTest:
             },
         ]
 
+        selected = self.PROFILES[self.profile]
+        if selected is not None:
+            tests = [test for test in tests if test["name"] in selected]
+
+        sweep_args = self.SIZE_SWEEPS[self.size_sweep]
+        if sweep_args is not None:
+            tests = [{**test, "args": list(sweep_args)} for test in tests]
+
+        # Algorithm/protocol A/B: one run per combination, tagged in the summary
+        tests = self._sweep(tests, "NCCL_ALGO", self.algorithms, "algorithm")
+        tests = self._sweep(tests, "NCCL_PROTO", self.protocols, "protocol")
+        # Raise the channel floor so NCCL can spread traffic over every NVLink
+        tests = self._sweep(tests, "NCCL_MIN_NCHANNELS", self.channels, "channels")
+        swept = bool(self.algorithms or self.protocols or self.channels)
+
         results = {
             "timestamp": self.timestamp,
             "hostfile": self.hostfile,
@@ -155,17 +944,43 @@ class NCCLTest:
             "node_count": self.node_count,
             "gpus_per_node": self.gpus_per_node,
             "total_processes": self.total_procs,
+            "profile": self.profile,
+            "size_sweep": self.size_sweep,
+            "algorithms": self.algorithms,
+            "protocols": self.protocols,
+            "channels": self.channels,
+            # Sweep variants are only comparable on the same hosts and rank count
+            "parallel_groups": 1 if swept else min(self.parallel_groups, len(tests), self.node_count),
             "tests": []
         }
+        if selected is not None:
+            results["profile_note"] = ("Partial campaign: allreduce = reduce_scatter + allgather, "
+                                       "so skipped collectives are derivable on a healthy fabric")
 
-        for test in tests:
-            result = self.run_test(test["name"], test["binary"], test["args"])
-            results["tests"].append(result)
+        if self.warmup and not self.daemon:
+            # The daemon warms up every message size itself
+            results["warmup"] = self._warmup()
+
+        if self.daemon:
+            results["tests"] = self._run_daemon(tests)
+        elif results["parallel_groups"] > 1:
+            results["tests"] = self._run_parallel(tests)
+        else:
+            for test in tests:
+                result = self._run_entry(test)
+                results["tests"].append(result)
+
+        if swept:
+            results["best_by_size"] = self._best_by_size(results["tests"])
+
+        summary_parquet = self._write_summary_parquet(results["tests"])
+        if summary_parquet:
+            results["summary_parquet"] = summary_parquet
 
         # Save summary
         summary_file = os.path.join(self.output_dir, f"test_summary_{self.timestamp}.json")
-        with open(summary_file, 'w') as f:
-            json.dump(results, f, indent=2)
+        with open(summary_file, 'wb') as f:
+            f.write(_dumps(results, indent=True))
 
         print(f"\n{'='*60}")
         print(f"All tests completed!")
@@ -180,20 +995,101 @@ def main():
     parser.add_argument("--hostfile", required=True, help="MPI hostfile")
     parser.add_argument("--gpus-per-node", type=int, default=8, help="Number of GPUs per node")
     parser.add_argument("--output-dir", default="./results", help="Output directory")
+    parser.add_argument("--parallel-groups", type=int, default=1,
+                        help="Split hosts into N disjoint groups and run tests concurrently "
+                             "(each test then measures only its group's nodes)")
+    parser.add_argument("--profile", choices=sorted(NCCLTest.PROFILES), default="full",
+                        help="Test set: full (all 4), fast (all_reduce + all_gather), "
+                             "allreduce-only")
+    parser.add_argument("--sweep", choices=list(NCCLTest.SIZE_SWEEPS), default="full",
+                        help="Message sizes: full (8B..8G/1G, factor 2), bw (1M..8G, factor 4), "
+                             "lat (8B..4K, 1000 iters)")
+    parser.add_argument("--check-once", action=argparse.BooleanOptionalAction, default=True,
+                        help="Validate each test with a short -c 1 run, then measure with -c 0 "
+                             "(default: on)")
+    parser.add_argument("--test-timeout", type=float, default=3600,
+                        help="Kill a test's mpirun process tree after SEC seconds, 0 = never "
+                             "(default: 3600)", metavar="SEC")
+    parser.add_argument("--no-warmup", action="store_true",
+                        help="Skip the short untimed all_reduce run before the tests")
+    parser.add_argument("--dvm", action="store_true",
+                        help="Launch all tests through one persistent PRRTE DVM (prte/prun) "
+                             "instead of a fresh mpirun per test")
+    parser.add_argument("--no-tree-spawn", action="store_true",
+                        help="Launch every daemon over SSH from the head node (debugging)")
+    parser.add_argument("--algorithms",
+                        help="Comma-separated NCCL_ALGO values to sweep, e.g. tree,ring,nvls")
+    parser.add_argument("--protocols",
+                        help="Comma-separated NCCL_PROTO values to sweep, e.g. LL,LL128,Simple")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Measure all collectives in one mpirun with benchmark_daemon.py "
+                             "(torch.distributed, one NCCL init) instead of nccl-tests")
+    parser.add_argument("--channel-sweep", action="store_true",
+                        help="Run each test with NCCL_MIN_NCHANNELS = "
+                             f"{','.join(NCCLTest.CHANNEL_COUNTS)} and report the best per size")
+    parser.add_argument("--dedup-log", action="store_true",
+                        help="Keep only the first copy of NCCL INFO topology lines that every "
+                             "rank repeats (filters output in Python instead of splicing it)")
+    parser.add_argument("--numa-bind", action="store_true",
+                        help="Bind each rank to cores on its GPU's NUMA node (ppr:K:numa:PE=C, "
+                             "sized from the launch node: it must match the workers' CPU layout)")
+    parser.add_argument("--verbose", action="store_true",
+                        help="Have mpirun print each rank's binding (--report-bindings)")
+    parser.add_argument("--env-file",
+                        help="JSON or YAML mapping of NCCL_* variables (e.g. NCCL_IB_HCA, "
+                             "NCCL_SOCKET_IFNAME) overriding the built-in defaults")
+    parser.add_argument("--auto-topo", action="store_true",
+                        help="Generate an NCCL topology XML from nvidia-smi topo -mp and pass it "
+                             "as NCCL_TOPO_FILE (output dir must be shared by all hosts)")
 
     args = parser.parse_args()
 
+    if args.daemon and (args.algorithms or args.protocols or args.channel_sweep
+                        or args.parallel_groups > 1):
+        parser.error("--daemon runs one launch and cannot be combined with sweeps or --parallel-groups")
+    if args.parallel_groups > 1 and (args.algorithms or args.protocols or args.channel_sweep):
+        parser.error("sweeps compare variants on the same hosts and cannot be combined "
+                     "with --parallel-groups")
+
+    if args.daemon and importlib.util.find_spec("torch") is None:
+        parser.error("--daemon needs PyTorch (torch) installed on every host")
+
     if not os.path.exists(args.hostfile):
         print(f"Error: Hostfile not found: {args.hostfile}")
         sys.exit(1)
 
+    nccl_env = None
+    if args.env_file:
+        try:
+            nccl_env = _load_env_file(args.env_file)
+        except (OSError, ValueError) as e:
+            parser.error(f"--env-file: {e}")
+
     tester = NCCLTest(
         hostfile=args.hostfile,
         gpus_per_node=args.gpus_per_node,
-        output_dir=args.output_dir
+        output_dir=args.output_dir,
+        parallel_groups=args.parallel_groups,
+        profile=args.profile,
+        size_sweep=args.sweep,
+        check_once=args.check_once,
+        channel_sweep=args.channel_sweep,
+        dedup_log=args.dedup_log,
+        test_timeout=args.test_timeout,
+        warmup=not args.no_warmup,
+        use_dvm=args.dvm,
+        tree_spawn=not args.no_tree_spawn,
+        algorithms=args.algorithms.split(',') if args.algorithms else None,
+        protocols=args.protocols.split(',') if args.protocols else None,
+        nccl_env=nccl_env,
+        auto_topo=args.auto_topo,
+        daemon=args.daemon,
+        numa_bind=args.numa_bind,
+        verbose=args.verbose
     )
 
-    results = tester.run_all_tests()
+    with tester:
+        results = tester.run_all_tests()
 
     # Print summary
     print("\nSummary:")